@@ -33,6 +33,7 @@ from src.api.api import api_router
 from fastapi.responses import JSONResponse
 # Import the state manager
 from src.utils.state_manager import StateManager
+from src.services.weather_service import close_http_session
 
 # Configure logging
 os.makedirs('logs', exist_ok=True)
@@ -315,6 +316,7 @@ curl -X GET "http://localhost:8080/api/rooms"
 def handle_shutdown(signum, frame):
     logger.warning("Received shutdown signal")
     engine.dispose()
+    close_http_session()
     sys.exit(0)
 
 signal.signal(signal.SIGINT, handle_shutdown)
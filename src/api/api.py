@@ -1,7 +1,7 @@
 """REST API for controlling Smart Home devices"""
 
 from fastapi import APIRouter, Depends, HTTPException, Body, Query, Path
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 from enum import Enum
@@ -87,7 +87,8 @@ def get_devices(
     Get all devices or filter by type or room
     """
     try:
-        query = db.query(Device)
+        # Load each device's room and sensors with the devices themselves
+        query = db.query(Device).options(joinedload(Device.room), selectinload(Device.sensors))
         
         if device_type:
             query = query.filter(Device.type == device_type)
@@ -100,10 +101,7 @@ def get_devices(
         result = []
         for device in devices:
             # Get room name if available
-            room_name = None
-            if device.room_id:
-                room = db.query(Room).filter(Room.id == device.room_id).first()
-                room_name = room.name if room else None
+            room_name = device.room.name if device.room else None
             
             # Get sensor data
             sensors_data = []
@@ -145,16 +143,16 @@ def get_device(
     Get detailed information about a specific device
     """
     try:
-        device = db.query(Device).filter(Device.id == device_id).first()
+        device = db.query(Device)\
+            .options(joinedload(Device.room), selectinload(Device.sensors))\
+            .filter(Device.id == device_id)\
+            .first()
         
         if not device:
             raise HTTPException(status_code=404, detail=f"Device with ID {device_id} not found")
         
         # Get room name if available
-        room_name = None
-        if device.room_id:
-            room = db.query(Room).filter(Room.id == device.room_id).first()
-            room_name = room.name if room else None
+        room_name = device.room.name if device.room else None
         
         # Get sensor data
         sensors_data = []
@@ -428,7 +426,7 @@ def get_rooms(db: Session = Depends(get_db_session)):
     Get all rooms with their devices
     """
     try:
-        rooms = db.query(Room).all()
+        rooms = db.query(Room).options(selectinload(Room.devices)).all()
         
         result = []
         for room in rooms:
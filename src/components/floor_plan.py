@@ -2,7 +2,7 @@ import json
 from loguru import logger
 from nicegui import ui
 from src.database import SessionLocal
-from src.models.room import Room
+from src.models.room import Room, normalize_room_type
 from src.models.device import Device
 from src.models.sensor import Sensor
 from src.models.container import Container
@@ -10,13 +10,26 @@ from src.utils.event_system import EventSystem
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Dict, List
 import asyncio
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 import random
 from datetime import datetime
 import threading
 import time  # Add time module for UI refresh timing
+from functools import lru_cache
 from src.utils.smart_home_simulator import SmartHomeSimulator
 
+UPDATE_DEBOUNCE_SECONDS = 0.25  # Window for coalescing bursts of sensor updates
+
+@lru_cache(maxsize=None)
+def _sensor_value_template(unit: str, value_type: type) -> str:
+    """Format template for readings of one type in a unit, built once per pair"""
+    spec = '{:.2f}' if issubclass(value_type, (int, float)) else '{}'
+    return f"{spec} {unit.replace('{', '{{').replace('}', '}}')}".strip()
+
+def format_sensor_value(value, unit: str = '') -> str:
+    """Format a sensor reading for display, e.g. '21.50 °C'"""
+    return _sensor_value_template(unit or '', type(value)).format(value)
+
 class FloorPlan:
     # Class-level task tracking
     _class_ui_refresh_task = None
@@ -57,6 +70,7 @@ class FloorPlan:
         self.device_elements = {}
         self.update_lock = asyncio.Lock()
         self.pending_updates = {}  # Track sensors that need UI updates
+        self._update_task = None  # Debounced task that flushes pending_updates
         self.device_control_dialogs = {}  # Store device control dialogs
         self.simulator = SmartHomeSimulator.get_instance(self.event_system)  # Get simulator instance
         self.last_ui_refresh = 0  # Track when we last refreshed the UI
@@ -65,6 +79,8 @@ class FloorPlan:
         # Now register the direct event handlers for real-time updates
         self.event_system.on('sensor_update', self._handle_sensor_update_event)
         self.event_system.on('device_update', self._handle_device_update_event)
+        self.event_system.on('device_added', self._handle_device_added_event)
+        self.event_system.on('device_removed', self._handle_device_removed_event)
         
         # Start the UI refresh task (with class-level tracking)
         self._start_ui_refresh_task()
@@ -73,55 +89,102 @@ class FloorPlan:
 
     def _normalize_room_type(self, room_type: str) -> str:
         """Normalize room type for consistent comparison"""
-        return room_type.lower().replace(' ', '_')
+        return normalize_room_type(room_type)
     
     async def _handle_sensor_update_event(self, data):
         """Event handler that calls the public sensor update method"""
-        try:
-            sensor_id = data.get('sensor_id') or data.get('id')
-            device_id = data.get('device_id')
-            value = data.get('value')
-            unit = data.get('unit', '')
-            
-            if all([sensor_id, device_id, value is not None]):
-                # Also store the data in our sensor states for later reference
-                self.sensor_states[sensor_id] = {
-                    'value': value,
-                    'unit': unit,
-                    'device_id': device_id,
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Update the UI directly
-                await self.update_sensor_value(sensor_id, device_id, value, unit)
-        except Exception as e:
-            logger.error(f"Error handling sensor update event: {e}")
+        sensor_id = data.get('sensor_id') or data.get('id')
+        device_id = data.get('device_id')
+        value = data.get('value')
+        if not sensor_id or not device_id or value is None:
+            return
+        unit = data.get('unit', '')
+        timestamp = data.get('timestamp') or datetime.now().isoformat()
+        
+        # Skip the UI round-trip when the reading is unchanged since the last event
+        previous = self.sensor_states.get(sensor_id)
+        if previous and previous['value'] == value and previous['unit'] == unit:
+            previous['timestamp'] = timestamp
+            return
+        
+        # Also store the data in our sensor states for later reference
+        self.sensor_states[sensor_id] = {
+            'value': value,
+            'unit': unit,
+            'device_id': device_id,
+            'timestamp': timestamp
+        }
+        
+        # Devices that are not drawn on the floor plan have nothing to update
+        if device_id not in self.device_elements:
+            return
+        
+        # Queue the UI update; bursts are coalesced so each sensor is drawn once
+        self.pending_updates[sensor_id] = (device_id, value, unit)
+        self._schedule_update()
+    
+    def _schedule_update(self):
+        """Schedule a debounced flush of pending sensor updates if none is queued"""
+        if self._update_task is None or self._update_task.done():
+            self._update_task = asyncio.create_task(self._debounced_update())
+    
+    async def _debounced_update(self):
+        """Wait for a burst of updates to settle, then apply them"""
+        await asyncio.sleep(UPDATE_DEBOUNCE_SECONDS)
+        # Keep flushing while new updates arrived during the previous flush
+        while self.pending_updates:
+            await self._batch_update()
     
     async def _handle_device_update_event(self, data):
         """Event handler that calls the public device counter update method"""
-        try:
-            device_id = data.get('device_id')
-            update_counter = data.get('update_counter', 0)
-            status = data.get('status', None)
+        device_id = data.get('device_id')
+        if device_id is None:
+            return
+        update_counter = data.get('update_counter', 0)
+        status = data.get('status', None)
+        
+        # Store the device state for later reference
+        self.device_states[device_id] = {
+            'name': data.get('name', ''),
+            'type': data.get('type', ''),
+            'location': data.get('location', 'Unknown'),
+            'update_counter': update_counter,
+            'status': status
+        }
+        
+        # Update the counter badge (handles its own errors)
+        await self.update_device_counter(device_id, update_counter)
+        
+        # Also update status if provided
+        if status is not None:
+            self.update_device_status(device_id, status)
             
-            if device_id is not None:
-                # Store the device state for later reference
-                self.device_states[device_id] = {
-                    'name': data.get('name', ''),
-                    'type': data.get('type', ''),
-                    'location': data.get('location', 'Unknown'),
-                    'update_counter': update_counter,
-                    'status': status
-                }
-                
-                # Update the counter badge
-                await self.update_device_counter(device_id, update_counter)
-                
-                # Also update status if provided
-                if status is not None:
-                    await self.update_device_status(device_id, status)
-        except Exception as e:
-            logger.error(f"Error handling device update event: {e}")
+    async def _handle_device_added_event(self, data):
+        """Event handler that records a newly added device and, if it has one, its room"""
+        device_id = data.get('device_id')
+        if device_id is None:
+            return
+        self.device_states.setdefault(device_id, {
+            'name': data.get('name', ''),
+            'type': data.get('type', ''),
+            'location': data.get('location', 'Unknown'),
+            'update_counter': 0,
+            'status': None
+        })
+        # Senders pass the normalized room type, the key used by device_room_map
+        room_type = data.get('room_type')
+        if room_type:
+            self.device_room_map[device_id] = room_type
+            logger.debug(f"Mapped added device {device_id} to room {room_type}")
+
+    async def _handle_device_removed_event(self, data):
+        """Event handler that forgets a removed device"""
+        device_id = data.get('device_id')
+        if device_id is None:
+            return
+        self.device_room_map.pop(device_id, None)
+        self.device_states.pop(device_id, None)
+        logger.debug(f"Removed device {device_id} from room mapping")
             
     def _get_default_value(self, sensor_type: str) -> float:
         """Get default value for a sensor type"""
@@ -208,21 +271,29 @@ class FloorPlan:
         """Initialize the floor plan visualization with rooms and devices"""
         try:
             with SessionLocal() as session:
-                # Load all rooms with devices and sensors
+                # Load all rooms with devices and sensors, using one IN query per
+                # level and only the columns the floor plan displays
                 rooms = session.query(Room).options(
-                    joinedload(Room.devices).joinedload(Device.sensors)
+                    selectinload(Room.devices)
+                    .load_only(Device.id, Device.name, Device.type)
+                    .selectinload(Device.sensors)
+                    .load_only(
+                        Sensor.id, Sensor.name, Sensor.type, Sensor.unit,
+                        Sensor._current_value_db, Sensor.min_value, Sensor.max_value
+                    )
                 ).all()
                 
                 # Create room elements first
+                room_types = []
                 for room in rooms:
                     self._create_room_card(room, container)
                     # Store room data for reference with normalized room type
                     normalized_room_type = self._normalize_room_type(room.room_type)
                     self.rooms[normalized_room_type] = room
+                    room_types.append(normalized_room_type)
                 
                 # Initialize devices and sensors after all rooms are created
-                for room in rooms:
-                    normalized_room_type = self._normalize_room_type(room.room_type)
+                for room, normalized_room_type in zip(rooms, room_types):
                     self._initialize_room_devices(normalized_room_type, room.devices, session)
                 
                 logger.info(f'Initialized {len(self.rooms)} rooms with devices')
@@ -273,29 +344,23 @@ class FloorPlan:
             
             for device in devices:
                 try:
-                    # Refresh device to ensure sensors are loaded
-                    session.refresh(device)
-                    
-                    # Create device data structure with all sensors
+                    # Create device data structure with all sensors (already eager-loaded)
                     device_data = {
                         'id': device.id,
                         'name': device.name,
                         'type': device.type,  # Ensure device type is included
-                        'sensors': []
+                        'sensors': [
+                            {
+                                'id': sensor.id,
+                                'name': sensor.name,
+                                'value': sensor.current_value,
+                                'unit': sensor.unit,
+                                'type': sensor.type
+                            }
+                            for sensor in device.sensors
+                        ]
                     }
                     
-                    # Add all sensors
-                    for sensor in device.sensors:
-                        sensor_data = {
-                            'id': sensor.id,
-                            'name': sensor.name,
-                            'value': sensor.current_value,
-                            'unit': sensor.unit,
-                            'type': sensor.type
-                        }
-                        device_data['sensors'].append(sensor_data)
-                        logger.debug(f"Added sensor {sensor.name} (ID: {sensor.id}) to device {device.name}")
-                    
                     # Add device to room
                     self._add_device(room_card, device_data)
                     
@@ -379,8 +444,6 @@ class FloorPlan:
                             if sensor_id:
                                 # Initialize with current value if available
                                 value = sensor.get('value', 'N/A')
-                                if isinstance(value, (int, float)):
-                                    value = f"{value:.2f}"
                                 
                                 # Get sensor type and icon
                                 sensor_type = sensor.get('type', '').lower()
@@ -389,7 +452,7 @@ class FloorPlan:
                                 # Format the sensor name and value
                                 sensor_name = sensor.get('name', '')
                                 unit = sensor.get('unit', '')
-                                formatted_value = f"{value} {unit}".strip()
+                                formatted_value = format_sensor_value(value, unit)
                                 
                                 # Create sensor row with improved alignment and spacing
                                 with ui.card().classes('w-full bg-gray-50/50 hover:bg-gray-100/50 transition-colors duration-200'):
@@ -426,19 +489,9 @@ class FloorPlan:
         except Exception as e:
             logger.error(f"Error adding device to visualization: {e}")
 
-    def _format_value_with_unit(self, value, unit):
-        """Format value with unit for display"""
-        if isinstance(value, (int, float)):
-            return f"{value:.1f}{unit}"
-        return f"{value}{unit}"
-
     def _format_sensor_value(self, sensor) -> str:
         """Format sensor value with unit"""
-        value = sensor.current_value
-        unit = self._get_sensor_unit(sensor.type)
-        if isinstance(value, (int, float)):
-            return f"{value:.1f}{unit}"
-        return f"{value}{unit}"
+        return format_sensor_value(sensor.current_value, self._get_sensor_unit(sensor.type))
 
     def _get_sensor_unit(self, sensor_type: str) -> str:
         """Get the appropriate unit for sensor type"""
@@ -511,7 +564,7 @@ class FloorPlan:
     async def _handle_device_update(self, data):
         """Handle device update events using data binding"""
         try:
-            logger.debug(f"Device update received: {data}")
+            logger.debug("Device update received: {}", data)
             device_id = data.get('device_id')
             device_name = data.get('name', '')
             updates = data.get('update_counter', 0)
@@ -519,14 +572,11 @@ class FloorPlan:
             # Log to debug the data we're getting
             logger.debug(f"Device update received: {device_id}, name: {device_name}, counter: {updates}")
             
-            # Get room type from our mapping or database
+            # Get room type from our mapping, falling back to the event payload
             room_type = self.device_room_map.get(device_id)
-            if not room_type:
-                with SessionLocal() as session:
-                    device = session.query(Device).get(device_id)
-                    if device and device.container:
-                        room_type = device.container.location
-                        self.device_room_map[device_id] = room_type
+            if not room_type and data.get('location'):
+                room_type = self._normalize_room_type(data['location'])
+                self.device_room_map[device_id] = room_type
             
             if not room_type:
                 logger.error(f"Could not find room type for device {device_id}")
@@ -546,7 +596,7 @@ class FloorPlan:
         """Handle sensor update events using data binding"""
         try:
             # Log more details about the update
-            logger.debug(f"Sensor update received: {data}")
+            logger.debug("Sensor update received: {}", data)
             
             # Extract sensor data - handle both direct sensor updates and device updates
             sensor_id = data.get('sensor_id')  # From device update
@@ -559,14 +609,14 @@ class FloorPlan:
             unit = data.get('unit', '')
             
             if not all([sensor_id, device_id, new_value is not None]):
-                logger.debug(f"Skipping sensor update due to missing data: {data}")
+                logger.debug("Skipping sensor update due to missing data: {}", data)
                 return
             
             # Update sensor value through the public method
             await self.update_sensor_value(sensor_id, device_id, new_value, unit)
         except Exception as e:
             logger.error(f"Error handling sensor update: {str(e)}")
-            logger.debug(f"Problematic event data: {data}")
+            logger.debug("Problematic event data: {}", data)
 
     async def update_device_counter(self, device_id, update_counter):
         """Public method to update a device's counter badge
@@ -602,40 +652,45 @@ class FloorPlan:
             unit: The unit of measurement (optional)
         """
         try:
-            logger.debug(f"Updating sensor {sensor_id} value to {new_value} {unit}")
-            
-            # Find the sensor element and its container
-            device_elements = self.device_elements.get(device_id, {})
-            sensor_elements = device_elements.get('sensors', {})
-            sensor_label = sensor_elements.get(sensor_id)
-            container = device_elements.get('container')
-            
-            if sensor_label and container:
-                try:
-                    # Format the value nicely
-                    formatted_value = f"{new_value:.2f}" if isinstance(new_value, (int, float)) else str(new_value)
-                    formatted_value = f"{formatted_value} {unit}".strip()
-                    
-                    # Update the label text directly - avoid batching for real-time responsiveness
-                    sensor_label.text = formatted_value
-                    
-                    # Force immediate update for this element to ensure real-time display
-                    ui.update(sensor_label)
-                    
-                    # Record when we last updated the UI
-                    self.last_ui_refresh = time.time()
-                    
-                    logger.debug(f"Updated sensor {sensor_id} to {formatted_value}")
-                except Exception as e:
-                    logger.error(f"Error updating sensor label: {str(e)}")
-            else:
-                if not sensor_label:
-                    logger.debug(f"No UI element found for sensor {sensor_id} in device {device_id}")
-                if not container:
-                    logger.debug(f"No container found for device {device_id}")
+            sensor_label = self._set_sensor_text(sensor_id, device_id, new_value, unit)
+            if sensor_label is not None:
+                # Force immediate update for this element to ensure real-time display
+                ui.update(sensor_label)
         except Exception as e:
             logger.error(f"Error updating sensor value: {str(e)}")
 
+    def _set_sensor_text(self, sensor_id, device_id, new_value, unit=''):
+        """Set a sensor label's text; the text setter sends the change to the client
+        
+        Returns:
+            The label if its text changed, otherwise None
+        """
+        logger.debug(f"Updating sensor {sensor_id} value to {new_value} {unit}")
+        
+        # Find the sensor element and its container
+        device_elements = self.device_elements.get(device_id, {})
+        sensor_label = device_elements.get('sensors', {}).get(sensor_id)
+        
+        if not sensor_label or not device_elements.get('container'):
+            logger.debug(f"No UI element found for sensor {sensor_id} in device {device_id}")
+            return None
+        
+        # Format the value nicely (same formatter as the initial render)
+        formatted_value = format_sensor_value(new_value, unit)
+        
+        # Only push a patch when the displayed text actually changes
+        if sensor_label.text == formatted_value:
+            logger.debug(f"Sensor {sensor_id} display unchanged, skipping update")
+            return None
+        
+        sensor_label.text = formatted_value
+        
+        # Record when we last updated the UI
+        self.last_ui_refresh = time.time()
+        
+        logger.debug(f"Updated sensor {sensor_id} to {formatted_value}")
+        return sensor_label
+
     def update_device_status(self, device_id: int, status: str):
         """Update the status display for a device
         
@@ -698,10 +753,11 @@ class FloorPlan:
                 return
                 
             logger.debug(f"Processing batch update for {len(self.pending_updates)} sensors")
-            self.pending_updates.clear()
+            pending, self.pending_updates = self.pending_updates, {}
             
-            # Trigger a global UI refresh
-            ui.update()
+            # Only the latest value per sensor is drawn; unchanged labels send nothing
+            for sensor_id, (device_id, value, unit) in pending.items():
+                self._set_sensor_text(sensor_id, device_id, value, unit)
             
         except Exception as e:
             logger.error(f"Error in batch update: {str(e)}")
@@ -23,7 +23,8 @@ logger.info(f"Database directory ensured: {DB_DIR}")
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/simulation.db")
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite specific
+    connect_args={"check_same_thread": False},  # SQLite specific
+    query_cache_size=1200  # Room for the eager-load statements run every tick
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -1,6 +1,6 @@
 from typing import Optional, List, ClassVar
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
-from sqlalchemy.orm import relationship, Mapped, joinedload
+from sqlalchemy.orm import relationship, Mapped, selectinload
 from datetime import datetime
 from src.models.base_model import BaseModel
 from src.utils.mqtt_helper import MQTTHelper
@@ -143,7 +143,7 @@ class Container(BaseModel):
         try:
             with SessionLocal() as session:
                 return session.query(cls).options(
-                    joinedload(cls.devices).joinedload(Device.sensors)
+                    selectinload(cls.devices).selectinload(Device.sensors)
                 ).all()
         except Exception as e:
             logger.error(f"Error getting all containers: {str(e)}")
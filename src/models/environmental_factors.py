@@ -89,9 +89,12 @@ class SimulationTime:
             self.effective_time = self.current_time
         self.last_update = datetime.now()
 
-@dataclass
+@dataclass(frozen=True)
 class WeatherImpactFactors:
-    """Impact factors of weather on sensor readings"""
+    """Impact factors of weather on sensor readings
+    
+    Instances are immutable and shared; get_impact_factors returns precomputed values.
+    """
     temperature_modifier: float  # Celsius modifier
     humidity_modifier: float    # Percentage points modifier
     light_level_modifier: float # Percentage points modifier
@@ -104,39 +107,60 @@ class WeatherImpactFactors:
     @classmethod
     def get_impact_factors(cls, condition: WeatherCondition, temp: float = 20.0, humidity: float = 50.0) -> 'WeatherImpactFactors':
         """Get impact factors considering temperature and humidity"""
-        base_factors = {
-            WeatherCondition.SUNNY: cls(3.0, -10.0, 30.0, -8.0, 0.0, 0.0, 1.2, -2.0),
-            WeatherCondition.PARTLY_CLOUDY: cls(1.0, -5.0, 15.0, -4.0, 0.0, 0.5, 1.0, -1.0),
-            WeatherCondition.CLOUDY: cls(-0.5, 5.0, -20.0, 2.0, 0.0, 0.8, 0.9, 0.0),
-            WeatherCondition.OVERCAST: cls(-1.5, 10.0, -30.0, 5.0, 0.0, 1.0, 0.8, 1.0),
-            WeatherCondition.LIGHT_RAIN: cls(-2.0, 20.0, -40.0, -5.0, 5.0, 1.2, 0.7, 2.0),
-            WeatherCondition.RAINY: cls(-3.0, 30.0, -50.0, -10.0, 10.0, 1.5, 0.6, 3.0),
-            WeatherCondition.HEAVY_RAIN: cls(-4.0, 40.0, -60.0, -15.0, 15.0, 1.8, 0.5, 4.0),
-            WeatherCondition.STORMY: cls(-5.0, 50.0, -70.0, -20.0, 25.0, 2.0, 0.4, 5.0),
-            WeatherCondition.LIGHT_SNOW: cls(-6.0, -5.0, -30.0, 5.0, -5.0, 2.2, 0.3, 3.0),
-            WeatherCondition.SNOWY: cls(-8.0, -10.0, -40.0, 8.0, -8.0, 2.5, 0.2, 4.0),
-            WeatherCondition.HEAVY_SNOW: cls(-10.0, -15.0, -50.0, 10.0, -10.0, 3.0, 0.1, 5.0),
-            WeatherCondition.FOGGY: cls(-1.0, 25.0, -45.0, 15.0, -5.0, 1.3, 0.7, 1.0),
-            WeatherCondition.WINDY: cls(-2.0, -15.0, -10.0, -12.0, 20.0, 2.0, 0.8, -2.0)
-        }
-        
-        factors = base_factors.get(condition, cls(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0))
-        
-        # Adjust for extreme temperatures
-        if temp > 30:  # Hot weather
-            factors.temperature_modifier *= 1.2
-            factors.humidity_modifier *= 1.3
-        elif temp < 0:  # Cold weather
-            factors.temperature_modifier *= 0.8
-            factors.humidity_modifier *= 0.7
-            
-        # Adjust for humidity
-        if humidity > 80:  # High humidity
-            factors.heat_index_modifier *= 1.3
-        elif humidity < 30:  # Low humidity
-            factors.heat_index_modifier *= 0.7
-            
-        return factors
+        # Only the temperature/humidity band affects the result, so index the
+        # precomputed table by band: 0 (low), 1 (normal), 2 (high)
+        temp_band = 2 if temp > 30 else 0 if temp < 0 else 1
+        humidity_band = 2 if humidity > 80 else 0 if humidity < 30 else 1
+        return _IMPACT_TABLE.get(condition, _NO_IMPACT_TABLE)[temp_band][humidity_band]
+
+# Base modifiers per condition, in WeatherImpactFactors field order
+_BASE_IMPACT_FACTORS = {
+    WeatherCondition.SUNNY: (3.0, -10.0, 30.0, -8.0, 0.0, 0.0, 1.2, -2.0),
+    WeatherCondition.PARTLY_CLOUDY: (1.0, -5.0, 15.0, -4.0, 0.0, 0.5, 1.0, -1.0),
+    WeatherCondition.CLOUDY: (-0.5, 5.0, -20.0, 2.0, 0.0, 0.8, 0.9, 0.0),
+    WeatherCondition.OVERCAST: (-1.5, 10.0, -30.0, 5.0, 0.0, 1.0, 0.8, 1.0),
+    WeatherCondition.LIGHT_RAIN: (-2.0, 20.0, -40.0, -5.0, 5.0, 1.2, 0.7, 2.0),
+    WeatherCondition.RAINY: (-3.0, 30.0, -50.0, -10.0, 10.0, 1.5, 0.6, 3.0),
+    WeatherCondition.HEAVY_RAIN: (-4.0, 40.0, -60.0, -15.0, 15.0, 1.8, 0.5, 4.0),
+    WeatherCondition.STORMY: (-5.0, 50.0, -70.0, -20.0, 25.0, 2.0, 0.4, 5.0),
+    WeatherCondition.LIGHT_SNOW: (-6.0, -5.0, -30.0, 5.0, -5.0, 2.2, 0.3, 3.0),
+    WeatherCondition.SNOWY: (-8.0, -10.0, -40.0, 8.0, -8.0, 2.5, 0.2, 4.0),
+    WeatherCondition.HEAVY_SNOW: (-10.0, -15.0, -50.0, 10.0, -10.0, 3.0, 0.1, 5.0),
+    WeatherCondition.FOGGY: (-1.0, 25.0, -45.0, 15.0, -5.0, 1.3, 0.7, 1.0),
+    WeatherCondition.WINDY: (-2.0, -15.0, -10.0, -12.0, 20.0, 2.0, 0.8, -2.0)
+}
+_NO_IMPACT = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+# Scales for (temperature, humidity) modifiers by temperature band, and for
+# the heat index modifier by humidity band; bands are 0 (low), 1, 2 (high)
+_TEMP_BAND_SCALES = ((0.8, 0.7), (1.0, 1.0), (1.2, 1.3))
+_HUMIDITY_BAND_SCALES = (0.7, 1.0, 1.3)
+
+def _impact_factors(base: tuple, temp_band: int, humidity_band: int) -> WeatherImpactFactors:
+    """Compute impact factors from base modifiers for a temperature/humidity band"""
+    temp, humid, light, air, noise, wind_chill, heat_index, pressure = base
+    temp_scale, humid_scale = _TEMP_BAND_SCALES[temp_band]
+    return WeatherImpactFactors(
+        temp * temp_scale,
+        humid * humid_scale,
+        light,
+        air,
+        noise,
+        wind_chill,
+        heat_index * _HUMIDITY_BAND_SCALES[humidity_band],
+        pressure
+    )
+
+def _impact_table(base: tuple) -> tuple:
+    """All impact factors for one condition, indexed [temp_band][humidity_band]"""
+    return tuple(
+        tuple(_impact_factors(base, temp_band, humidity_band) for humidity_band in range(3))
+        for temp_band in range(3)
+    )
+
+# Impact factors for every condition and band, built once at import
+_IMPACT_TABLE = {condition: _impact_table(base) for condition, base in _BASE_IMPACT_FACTORS.items()}
+_NO_IMPACT_TABLE = _impact_table(_NO_IMPACT)
 
 @dataclass
 class EnvironmentalState:
@@ -2,6 +2,14 @@ from sqlalchemy import Column, String, Integer, ForeignKey, Boolean
 from sqlalchemy.orm import relationship
 from src.models.base_model import BaseModel
 from src.database import Base
+from functools import lru_cache
+import sys
+
+
+@lru_cache(maxsize=None)
+def normalize_room_type(room_type: str) -> str:
+    """Normalize room type for consistent comparison (cached and interned, room types are few)"""
+    return sys.intern(room_type.lower().strip().replace(" ", "_"))
 
 class Room(BaseModel):
     """Room model for smart home rooms"""
@@ -31,7 +39,12 @@ class Room(BaseModel):
 
     def _normalize_room_type(self, room_type: str) -> str:
         """Normalize room type for consistent comparison"""
-        return room_type.lower().strip().replace(" ", "_")
+        return normalize_room_type(room_type)
+
+    @property
+    def normalized_type(self) -> str:
+        """Room type normalized for use as a lookup key"""
+        return normalize_room_type(self.room_type)
 
     def __repr__(self):
         return f"<Room(name='{self.name}', type='{self.room_type}', {'indoor' if self.is_indoor else 'outdoor'})>" 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Text, update
 from sqlalchemy.orm import relationship, backref, Mapped
 from src.models.base_model import BaseModel
 from typing import TYPE_CHECKING, Optional
@@ -39,8 +39,15 @@ class Scenario(BaseModel):
         try:
             from src.database import db_session
             with db_session() as session:
-                # Deactivate all scenarios first
-                session.query(type(self)).update({'is_active': False})
+                # Deactivate any active scenarios first (plain UPDATE, no session sync);
+                # the filter keeps SQLite from rewriting rows that are already inactive
+                result = session.execute(
+                    update(type(self))
+                    .where(type(self).is_active == True)
+                    .values(is_active=False)
+                    .execution_options(synchronize_session=False)
+                )
+                logger.debug("Deactivated {} active scenarios", result.rowcount)
                 
                 # Toggle this scenario's state
                 self.is_active = not self.is_active
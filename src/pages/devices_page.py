@@ -1,7 +1,7 @@
 from nicegui import ui
 from src.models.device import Device
 from src.models.sensor import Sensor
-from src.models.room import Room
+from src.models.room import Room, normalize_room_type
 from src.components.device_item import DeviceItem
 from src.models.device import Device
 from loguru import logger
@@ -134,12 +134,17 @@ class DevicesPage:
         except Exception as e:
             print(f"Error showing delete dialog: {str(e)}")
 
-    def delete_handler(self, dialog, device):
+    async def delete_handler(self, dialog, device):
         '''Handles the device deletion'''
         try:
             # Delete the device from the database
+            device_id = device.id
             device.delete()
             dialog.close()
+
+            # Let listeners drop any cached state for this device
+            if self.event_system:
+                await self.event_system.emit('device_removed', {'device_id': device_id})
             
             # Refresh the device list
             self.refresh_device_list()
@@ -193,11 +198,11 @@ class DevicesPage:
             print(f"Error checking general step input: {str(e)}")
             ui.notify('Error checking device name')
 
-    def create_device(self, dialog, name_input, sensor_select):
+    async def create_device(self, dialog, name_input, sensor_select):
         '''Creates a new device'''
         try:
-            # Create device
-            device = Device.add(device_name=name_input.value)
+            # Create device; the dialog only asks for a name, so there is no type or room yet
+            device = Device.add(name=name_input.value, type='unknown', location=None)
             
             # Add selected sensors
             if hasattr(sensor_select, 'value') and sensor_select.value:
@@ -207,6 +212,18 @@ class DevicesPage:
                         sensor.device_id = device.id
                         sensor.save()
 
+            # Let listeners cache the new device without querying the database
+            if self.event_system:
+                event_data = {'device_id': device.id, 'name': device.name}
+                # Read the room by id in a short-lived session; the relationship on
+                # the device would lazy-load through the session Device.add left open
+                if device.room_id is not None:
+                    with SessionLocal() as session:
+                        room_type = session.query(Room.room_type).filter(Room.id == device.room_id).scalar()
+                    if room_type:
+                        event_data['room_type'] = normalize_room_type(room_type)
+                await self.event_system.emit('device_added', event_data)
+
             dialog.close()
             self.refresh_device_list()
             self.update_stats()
@@ -4,94 +4,144 @@ from src.components.floor_plan import FloorPlan
 from src.utils.event_system import SmartHomeEvent, EventTrigger, EventSystem
 from src.models.container import Container
 from src.models.device import Device
-from src.models.sensor import Sensor
 from src.models.scenario import Scenario
 from src.models.room import Room
-from src.database import get_db as get_db_session, engine, SessionLocal, db_session
+from src.database import get_db as get_db_session, engine
 from src.constants.device_templates import ROOM_TYPES, SCENARIO_TEMPLATES, DEVICE_TEMPLATES
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy import update, case, or_
 from loguru import logger
 import asyncio
-import json
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from src.utils.smart_home_simulator import SmartHomeSimulator
-from src.database.database import db_session
 from src.utils.initial_data import initialize_scenarios
-from collections import defaultdict
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
 from src.models.environmental_factors import WeatherCondition, EnvironmentalState, Location, SimulationTime
 from src.services.weather_service import WeatherService, LocationType, LocationQuery
-import pytz
 from datetime import datetime, time
 import time as time_module  # Import time module for update timing
 from typing import Optional
-import requests
 from typing import List, Dict
-from dataclasses import dataclass
-import math
-import random
+import re
 import weakref
 from src.models.option import Option
 
 # Configure logger
 logger.add("logs/smart_home.log", rotation="500 MB", level="INFO")
 
-# Sensor mapping dictionary
-sensor_room_mapping = {
-    # Example mapping of sensor IDs to room names. Update as needed.
-    'sensor_1': 'Living Room',
-    'sensor_2': 'Kitchen',
-    # Add more mappings here
+# Weather response cache settings
+WEATHER_CACHE_TTL = 300  # Seconds a fetched weather response stays fresh
+WEATHER_CACHE_MAX_ENTRIES = 64
+
+# Constant select options and lookups, built once at import
+WEATHER_OPTIONS = tuple(w.value.replace('_', ' ').title() for w in WeatherCondition)
+WEATHER_FROM_LABEL = dict(zip(WEATHER_OPTIONS, WeatherCondition))
+WEATHER_LABELS = dict(zip(WeatherCondition, WEATHER_OPTIONS))
+LOCATION_TYPE_OPTIONS = tuple(t.value.title() for t in LocationType)
+LOCATION_TYPE_FROM_LABEL = {label.lower(): t for label, t in zip(LOCATION_TYPE_OPTIONS, LocationType)}
+
+def location_type_visibility(location_type: LocationType):
+    """Visibility transform showing an input only while its location type is selected"""
+    return lambda label: bool(label) and LOCATION_TYPE_FROM_LABEL.get(label.lower()) is location_type
+
+# Weather description keywords, longest first so "heavy rain" wins over "rain"
+WEATHER_KEYWORDS = tuple(sorted({
+    'sunny': WeatherCondition.SUNNY,
+    'partly cloudy': WeatherCondition.PARTLY_CLOUDY,
+    'cloudy': WeatherCondition.CLOUDY,
+    'overcast': WeatherCondition.OVERCAST,
+    'light rain': WeatherCondition.LIGHT_RAIN,
+    'drizzle': WeatherCondition.LIGHT_RAIN,
+    'rain': WeatherCondition.RAINY,
+    'heavy rain': WeatherCondition.HEAVY_RAIN,
+    'torrential': WeatherCondition.HEAVY_RAIN,
+    'thunderstorm': WeatherCondition.STORMY,
+    'light snow': WeatherCondition.LIGHT_SNOW,
+    'snow': WeatherCondition.SNOWY,
+    'heavy snow': WeatherCondition.HEAVY_SNOW,
+    'fog': WeatherCondition.FOGGY,
+    'windy': WeatherCondition.WINDY
+}.items(), key=lambda item: -len(item[0])))
+WEATHER_KEYWORD_RE = re.compile('|'.join(re.escape(keyword) for keyword, _ in WEATHER_KEYWORDS))
+WEATHER_BY_KEYWORD = dict(WEATHER_KEYWORDS)
+
+def normalize_condition_text(text: str) -> str:
+    """Lower-case a weather description and collapse its whitespace"""
+    return ' '.join(text.lower().split())
+
+@lru_cache(maxsize=256)
+def match_weather_condition(description: str) -> WeatherCondition:
+    """Map a weather description to the first (longest) matching condition keyword
+
+    Descriptions come from a small fixed vocabulary, so results are memoized
+    and each distinct string is normalized and matched only once.
+    """
+    match = WEATHER_KEYWORD_RE.search(normalize_condition_text(description))
+    return WEATHER_BY_KEYWORD[match.group()] if match else WeatherCondition.SUNNY
+
+@lru_cache(maxsize=1)
+def timestamp_text(second: int) -> str:
+    """Format an epoch second as "%Y-%m-%d %H:%M:%S"; repeated calls within a second reuse the text"""
+    return datetime.fromtimestamp(second).isoformat(sep=' ')
+
+# Air quality readings shown on the weather card: (response key, label)
+AIR_QUALITY_FIELDS = (
+    ('pm2_5', 'PM2.5'),
+    ('pm10', 'PM10'),
+    ('co', 'CO'),
+    ('no2', 'NO2'),
+    ('o3', 'O3'),
+)
+
+# Location search settings
+LOCATION_SEARCH_DEBOUNCE = 0.25  # Seconds to wait for typing to pause before searching
+LOCATION_SEARCH_MIN_LENGTH = 3
+LOCATION_SEARCH_CACHE_TTL = 300  # Seconds a search result stays fresh
+LOCATION_SEARCH_CACHE_MAX_ENTRIES = 64
+
+# Popular cities for quick selection: (name, region, country, tz_id)
+POPULAR_CITIES = (
+    ("San Francisco", "California", "United States", "America/Los_Angeles"),
+    ("New York", "New York", "United States", "America/New_York"),
+    ("London", "City of London", "United Kingdom", "Europe/London"),
+    ("Tokyo", "Tokyo", "Japan", "Asia/Tokyo"),
+    ("Singapore", "Singapore", "Singapore", "Asia/Singapore"),
+    ("Sydney", "New South Wales", "Australia", "Australia/Sydney"),
+    ("Dubai", "Dubai", "United Arab Emirates", "Asia/Dubai"),
+    ("Paris", "Ile-de-France", "France", "Europe/Paris"),
+    ("Berlin", "Berlin", "Germany", "Europe/Berlin"),
+    ("Mumbai", "Maharashtra", "India", "Asia/Kolkata")
+)
+
+def _city_to_dict(city):
+    """Location data dict for a popular city tuple"""
+    name, region, country, tz_id = city
+    return {'name': name, 'region': region, 'country': country, 'tz_id': tz_id}
+
+# Lower-cased names and "name, region" labels of the popular cities
+POPULAR_CITY_KEYS = frozenset(
+    key.lower()
+    for name, region, _, _ in POPULAR_CITIES
+    for key in (name, f"{name}, {region}")
+)
+# Location select entries for the popular cities, built once: display name -> location data
+POPULAR_LOCATION_OPTIONS = {
+    f"{city[0]}, {city[1]}": _city_to_dict(city)
+    for city in POPULAR_CITIES
 }
+POPULAR_LOCATION_OPTIONS_CI = {name.lower(): name for name in POPULAR_LOCATION_OPTIONS}
 
-@dataclass
-class WeatherImpactFactors:
-    """Enhanced impact factors with more realistic modifiers"""
-    temperature_modifier: float      # Celsius modifier
-    humidity_modifier: float        # Percentage points modifier
-    light_level_modifier: float    # Percentage points modifier
-    air_quality_modifier: float    # AQI points modifier
-    noise_level_modifier: float    # Decibel modifier
-    wind_chill_modifier: float     # Wind chill effect
-    heat_index_modifier: float     # Heat index effect
-    pressure_modifier: float       # Pressure modifier
-    
-    @classmethod
-    def get_impact_factors(cls, condition: WeatherCondition, temp: float, humidity: float) -> 'WeatherImpactFactors':
-        """Get impact factors considering temperature and humidity"""
-        base_factors = {
-            WeatherCondition.SUNNY: cls(3.0, -10.0, 30.0, -8.0, 0.0, 0.0, 1.2, -2.0),
-            WeatherCondition.PARTLY_CLOUDY: cls(1.0, -5.0, 15.0, -4.0, 0.0, 0.5, 1.0, -1.0),
-            WeatherCondition.CLOUDY: cls(-0.5, 5.0, -20.0, 2.0, 0.0, 0.8, 0.9, 0.0),
-            WeatherCondition.OVERCAST: cls(-1.5, 10.0, -30.0, 5.0, 0.0, 1.0, 0.8, 1.0),
-            WeatherCondition.LIGHT_RAIN: cls(-2.0, 20.0, -40.0, -5.0, 5.0, 1.2, 0.7, 2.0),
-            WeatherCondition.RAINY: cls(-3.0, 30.0, -50.0, -10.0, 10.0, 1.5, 0.6, 3.0),
-            WeatherCondition.HEAVY_RAIN: cls(-4.0, 40.0, -60.0, -15.0, 15.0, 1.8, 0.5, 4.0),
-            WeatherCondition.STORMY: cls(-5.0, 50.0, -70.0, -20.0, 25.0, 2.0, 0.4, 5.0),
-            WeatherCondition.LIGHT_SNOW: cls(-6.0, -5.0, -30.0, 5.0, -5.0, 2.2, 0.3, 3.0),
-            WeatherCondition.SNOWY: cls(-8.0, -10.0, -40.0, 8.0, -8.0, 2.5, 0.2, 4.0),
-            WeatherCondition.HEAVY_SNOW: cls(-10.0, -15.0, -50.0, 10.0, -10.0, 3.0, 0.1, 5.0),
-            WeatherCondition.FOGGY: cls(-1.0, 25.0, -45.0, 15.0, -5.0, 1.3, 0.7, 1.0),
-            WeatherCondition.WINDY: cls(-2.0, -15.0, -10.0, -12.0, 20.0, 2.0, 0.8, -2.0)
-        }
-        
-        factors = base_factors.get(condition)
-        
-        # Adjust for extreme temperatures
-        if temp > 30:  # Hot weather
-            factors.temperature_modifier *= 1.2
-            factors.humidity_modifier *= 1.3
-        elif temp < 0:  # Cold weather
-            factors.temperature_modifier *= 0.8
-            factors.humidity_modifier *= 0.7
-            
-        # Adjust for humidity
-        if humidity > 80:  # High humidity
-            factors.heat_index_modifier *= 1.3
-        elif humidity < 30:  # Low humidity
-            factors.heat_index_modifier *= 0.7
-            
-        return factors
+@dataclass(slots=True)
+class SensorEntry:
+    """Latest reading stored for a sensor"""
+    value: float
+    unit: str
+    timestamp: str
+    device_id: int
+    device_name: str
+    location: str
+    device_type: str
 
 class SmartHomePage:
     """Smart home monitoring and control page"""
@@ -109,13 +159,18 @@ class SmartHomePage:
         self.state_manager = state_manager
         # Get the FloorPlan singleton instance with our event system
         self.floor_plan = FloorPlan(self.event_system)
+        # One session factory for every handler on this page, backed by the pooled engine.
+        # Scenarios outlive the sessions that loaded them (snapshot, selected/active
+        # scenario), so committing must not expire them into reload queries
+        self._session_factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
         self.scenario_options = []
         self.scenarios = []
+        self._scenarios_by_name = {}  # In-memory scenario snapshot, refreshed on writes
         self.selected_scenario = None
         self.active_scenario = None
         
         # Initialize data structures for sensor and device updates
-        self.sensors = {}  # Dictionary to store sensor data keyed by sensor_id
+        self.sensors = {}  # SensorEntry per sensor_id
         self.devices = {}  # Dictionary to store device data keyed by device_id
         
         # UI components
@@ -131,6 +186,10 @@ class SmartHomePage:
         self.metar_input = None
         self.rooms_list = []
         self.weather_result_card = None
+        self._weather_details = None  # Weather card body, hidden until data arrives
+        self._aqi_card = None
+        self._weather_labels = {}  # Field name -> label on the weather card
+        self._last_weather_fields = {}  # Field name -> text last written to the card
         
         # Initialize connections for WebSocket support
         self.connections = weakref.WeakSet()
@@ -172,6 +231,16 @@ class SmartHomePage:
         self.include_aqi = True
         self._current_city = None
         self._current_location_query = None
+        self._weather_cache = OrderedDict()  # (query, include_aqi) -> (fetched_at, weather_data)
+        self._weather_requests = {}  # (query, include_aqi) -> in-flight fetch shared by concurrent callers
+        self._search_debounce_task = None  # Pending debounced location search
+        self._last_search_query = None  # Normalized filter text of the last search event
+        self._options_source = None  # (select, locations) the current options were built from
+        self._geocode_cache = OrderedDict()  # Normalized search query -> (fetched_at, locations)
+        self._location_update_task = None  # In-flight location/weather refresh
+        self._location_update_pending = False  # Another refresh requested while one was running
+        self._toggle_task = None  # In-flight scenario start/stop
+        self._last_sim_key = None  # (weather, location, minute) last pushed to the simulator
         
         # Default location
         self.current_location = Location(
@@ -180,20 +249,7 @@ class SmartHomePage:
             longitude=-122.4194,
             timezone="America/Los_Angeles"
         )
-        
-        # Popular cities for quick selection
-        self.popular_cities = [
-            {"name": "San Francisco", "region": "California", "country": "United States", "tz_id": "America/Los_Angeles"},
-            {"name": "New York", "region": "New York", "country": "United States", "tz_id": "America/New_York"},
-            {"name": "London", "region": "City of London", "country": "United Kingdom", "tz_id": "Europe/London"},
-            {"name": "Tokyo", "region": "Tokyo", "country": "Japan", "tz_id": "Asia/Tokyo"},
-            {"name": "Singapore", "region": "Singapore", "country": "Singapore", "tz_id": "Asia/Singapore"},
-            {"name": "Sydney", "region": "New South Wales", "country": "Australia", "tz_id": "Australia/Sydney"},
-            {"name": "Dubai", "region": "Dubai", "country": "United Arab Emirates", "tz_id": "Asia/Dubai"},
-            {"name": "Paris", "region": "Ile-de-France", "country": "France", "tz_id": "Europe/Paris"},
-            {"name": "Berlin", "region": "Berlin", "country": "Germany", "tz_id": "Europe/Berlin"},
-            {"name": "Mumbai", "region": "Maharashtra", "country": "India", "tz_id": "Asia/Kolkata"}
-        ]
+
 
         self._initialize_simulation()
 
@@ -206,10 +262,6 @@ class SmartHomePage:
         self.current_data = {}
         self.device_controls = None
         self.locations = {}
-        
-        # Initialize weather service if not already done
-        if not hasattr(self, 'weather_service') or self.weather_service is None:
-            self.weather_service = WeatherService()
 
     async def handle_sensor_update(self, data):
         """Store sensor update data without updating UI
@@ -217,25 +269,32 @@ class SmartHomePage:
         This method only receives data to store. The FloorPlan component
         handles the real-time UI updates directly via its own event handlers.
         """
-        try:
-            sensor_id = data.get('sensor_id') or data.get('id')
-            if not sensor_id:
-                logger.warning("Sensor update missing sensor_id")
-                return
-                
-            # Store sensor data for later use
-            self.sensors[sensor_id] = {
-                'value': data.get('value'),
-                'unit': data.get('unit', ''),
-                'timestamp': data.get('timestamp', datetime.now().isoformat()),
-                'device_id': data.get('device_id'),
-                'device_name': data.get('device_name') or data.get('name', ''),
-                'location': data.get('location', 'Unknown'),
-                'device_type': data.get('device_type') or data.get('type', '')
-            }
-            logger.debug(f'Stored sensor data: ID={sensor_id}')
-        except Exception as e:
-            logger.error(f"Error storing sensor update data: {e}")
+        if not isinstance(data, dict):
+            logger.warning(f"Ignoring malformed sensor update: {data!r}")
+            return
+            
+        sensor_id = data.get('sensor_id') or data.get('id')
+        if not sensor_id:
+            logger.warning("Sensor update missing sensor_id")
+            return
+            
+        # Fall back to the in-memory device registry for the device name
+        device_id = data.get('device_id')
+        device_name = data.get('device_name') or data.get('name')
+        if not device_name and device_id in self.devices:
+            device_name = self.devices[device_id]['name']
+            
+        # Store sensor data for later use
+        self.sensors[sensor_id] = SensorEntry(
+            value=data.get('value'),
+            unit=data.get('unit', ''),
+            timestamp=data.get('timestamp') or datetime.now().isoformat(),
+            device_id=device_id,
+            device_name=device_name or '',
+            location=data.get('location', 'Unknown'),
+            device_type=data.get('device_type') or data.get('type', '')
+        )
+        logger.debug(f'Stored sensor data: ID={sensor_id}')
             
     async def handle_device_update(self, data):
         """Store device update data without updating UI
@@ -243,36 +302,36 @@ class SmartHomePage:
         This method only receives data to store. The FloorPlan component
         handles the real-time UI updates directly via its own event handlers.
         """
-        try:
-            # Extract device ID
-            device_id = data.get('device_id')
-            if not device_id:
-                logger.warning("Device update missing device_id")
-                return
-                
-            # Store device data for later use
-            self.devices[device_id] = {
-                'name': data.get('name', ''),
-                'type': data.get('type', ''),
-                'location': data.get('location', 'Unknown Location'),
-                'update_counter': data.get('update_counter', 0)
-            }
-            logger.debug(f'Stored device data: ID={device_id}')
-        except Exception as e:
-            logger.error(f'Error storing device update data: {e}')
+        if not isinstance(data, dict):
+            logger.warning(f"Ignoring malformed device update: {data!r}")
+            return
+            
+        # Extract device ID
+        device_id = data.get('device_id')
+        if not device_id:
+            logger.warning("Device update missing device_id")
+            return
+            
+        # Store device data for later use
+        self.devices[device_id] = {
+            'name': data.get('name', ''),
+            'type': data.get('type', ''),
+            'location': data.get('location', 'Unknown Location'),
+            'update_counter': data.get('update_counter', 0)
+        }
+        logger.debug(f'Stored device data: ID={device_id}')
 
     def _load_initial_data(self):
         """Load initial data from database and templates"""
         try:
             logger.info("Loading initial data for smart home page")
             
-            with SessionLocal() as session:
+            with self._session_factory() as session:
                 # Load all scenarios
-                self.scenarios = session.query(Scenario).all()
-                self.scenario_options = [s.name for s in self.scenarios]
+                self._load_scenarios(session)
                 
                 # Check if there's an active scenario in the database
-                active_scenario = session.query(Scenario).filter_by(is_active=True).first()
+                active_scenario = next((s for s in self.scenarios if s.is_active), None)
                 
                 # Get pre-selected scenario if available (from state manager first, then database)
                 if self.state_manager:
@@ -293,7 +352,7 @@ class SmartHomePage:
                     if stored_scenario_name:
                         logger.info(f"Found stored scenario name in database: {stored_scenario_name}")
                         # Find the scenario with this name
-                        selected_scenario = session.query(Scenario).filter_by(name=stored_scenario_name).first()
+                        selected_scenario = self._scenarios_by_name.get(stored_scenario_name)
                         if selected_scenario:
                             logger.info(f"Setting selected scenario to {selected_scenario.name}")
                             self.selected_scenario = selected_scenario
@@ -343,6 +402,29 @@ class SmartHomePage:
             logger.error(f"Error loading initial data: {e}", exc_info=True)
             ui.notify("Failed to load initial data", type='negative')
 
+    def _load_scenarios(self, session):
+        """Load all scenarios with their containers in one pass and index them by name
+        
+        The page reads scenarios from this snapshot; it is only reloaded after
+        the page itself changes scenario state. Devices are not needed here:
+        starting or stopping a scenario loads them in its own session.
+        """
+        self._set_scenarios(self._query_scenarios(session))
+
+    def _query_scenarios(self, session):
+        """Query all scenarios with their containers; safe to call from a worker thread"""
+        # Objects are not expired on commit, so overwrite any already in the session
+        # with the rows just written by bulk UPDATEs
+        return session.query(Scenario).options(
+            selectinload(Scenario.containers)
+        ).populate_existing().all()
+
+    def _set_scenarios(self, scenarios):
+        """Replace the scenario snapshot and its name index"""
+        self.scenarios = scenarios
+        self.scenario_options = [s.name for s in scenarios]
+        self._scenarios_by_name = {s.name: s for s in scenarios}
+
     def _update_ui_for_active_scenario(self):
         """Update UI components to reflect active scenario state"""
         try:
@@ -377,40 +459,21 @@ class SmartHomePage:
         try:
             logger.info("🚀 Starting simulation initialization...")
             
-            # Load initial data but don't start any simulation
+            # Load initial data but don't start any simulation. This also resolves the
+            # active scenario (state manager first, then database), so no further
+            # scenario queries are needed here. Active scenarios are deliberately not
+            # deactivated to preserve their state when returning to this page.
             logger.info("Loading initial data...")
             self._load_initial_data()
+            logger.info(f"Loaded {len(self.scenarios)} available scenarios: {', '.join(self.scenario_options)}")
             
-            # We've removed the deactivation of active scenarios to preserve their state
-            # when returning to this page
-            with SessionLocal() as session:
-                logger.info("Loading available scenarios...")
-                # Load all available scenarios
-                scenarios = session.query(Scenario).all()
-                self.scenarios = scenarios
-                self.scenario_options = [s.name for s in scenarios]
-                logger.info(f"Loaded {len(scenarios)} available scenarios: {', '.join(self.scenario_options)}")
-                
-                # Check for active scenario from state manager first, then database
+            # If we have an active scenario, make sure it's properly set
+            if self.active_scenario and not self.selected_scenario:
+                logger.info("Setting selected scenario to active scenario")
+                self.selected_scenario = self.active_scenario
+                # Update state manager
                 if self.state_manager:
-                    self.active_scenario = self.state_manager.get_active_scenario()
-                    if self.active_scenario:
-                        logger.info(f"Retrieved active scenario from state manager: {self.active_scenario.name}")
-                
-                # If no active scenario from state manager, check database
-                if not self.active_scenario:
-                    active_scenario = session.query(Scenario).filter_by(is_active=True).first()
-                    if active_scenario:
-                        logger.info(f"Found active scenario in database: {active_scenario.name}")
-                        self.active_scenario = active_scenario
-                
-                # If we have an active scenario, make sure it's properly set
-                if self.active_scenario and not self.selected_scenario:
-                    logger.info("Setting selected scenario to active scenario")
-                    self.selected_scenario = self.active_scenario
-                    # Update state manager
-                    if self.state_manager:
-                        self.state_manager.set_selected_scenario(self.active_scenario)
+                    self.state_manager.set_selected_scenario(self.active_scenario)
                     
             logger.info("✅ Simulation initialized successfully")
             
@@ -419,138 +482,150 @@ class SmartHomePage:
             logger.exception("Detailed error trace:")
             ui.notify("Error initializing simulation", type='negative')
 
-    async def _fetch_weather_data(self):
+    async def _fetch_weather_data(self, force_refresh: bool = False):
         """Fetch weather data from API"""
         try:
-            if not hasattr(self, '_current_location_query'):
-                await self._safe_notify('Please select a location first', type='warning')
+            if self._current_location_query is None:
+                await self._safe_notify('Please select a location first', notification_type='warning')
                 return
                 
             # Fetch weather data
-            weather_data = self.weather_service.get_weather(self._current_location_query, self.include_aqi)
+            weather_data = await self._get_cached_weather(self._current_location_query, self.include_aqi, force_refresh)
             if weather_data:
-                self._update_weather_display(weather_data)
+                await self._update_weather_display(weather_data)
             else:
-                await self._safe_notify('No weather data available', type='warning')
+                await self._safe_notify('No weather data available', notification_type='warning')
             
         except Exception as e:
             logger.error(f"Error fetching weather data: {e}")
             logger.exception("Full traceback:")
-            await self._safe_notify(f'Error fetching weather data: {str(e)}', type='negative')
+            await self._safe_notify(f'Error fetching weather data: {str(e)}', notification_type='negative')
 
-    async def _update_weather_display(self, weather_data: dict):
-        """Update weather display with API data"""
-        try:
-            # Check if weather_result_card exists and is not None
-            if not hasattr(self, 'weather_result_card') or self.weather_result_card is None:
-                logger.warning("Cannot update weather display: weather_result_card is None")
-                return
-                
-            # Clear previous content
-            self.weather_result_card.clear()
+    async def _get_cached_weather(self, location_query: LocationQuery, include_aqi: bool = True,
+                                  force_refresh: bool = False) -> Optional[dict]:
+        """Get weather for a location, reusing a recent response unless a refresh is forced"""
+        key = (location_query.to_query(), include_aqi)
+        now = time_module.monotonic()
+        
+        cached = None if force_refresh else self._weather_cache.get(key)
+        if cached and now - cached[0] < WEATHER_CACHE_TTL:
+            self._weather_cache.move_to_end(key)
+            logger.debug(f"Using cached weather data for {key[0]}")
+            return cached[1]
+        
+        # The weather service uses blocking HTTP, keep it off the event loop; concurrent
+        # callers asking for the same weather share one request
+        request = self._weather_requests.get(key)
+        if request is None:
+            request = asyncio.create_task(
+                asyncio.to_thread(self.weather_service.get_weather, location_query, include_aqi)
+            )
+            self._weather_requests[key] = request
+            request.add_done_callback(lambda _: self._weather_requests.pop(key, None))
+        # Shielded so one cancelled caller does not abort the fetch for the others
+        weather_data = await asyncio.shield(request)
+        if weather_data:
+            self._weather_cache[key] = (now, weather_data)
+            self._weather_cache.move_to_end(key)
+            while len(self._weather_cache) > WEATHER_CACHE_MAX_ENTRIES:
+                self._weather_cache.popitem(last=False)
+        return weather_data
+
+    async def _update_weather_display(self, weather_data: dict, update_simulation: bool = True):
+        """Update weather display with API data
+        
+        Errors propagate to the calling fetch/location handler, which logs them.
+        
+        Args:
+            weather_data: Weather response to display
+            update_simulation: Also push the weather into the simulator; callers
+                that already applied it pass False to avoid a second update
+        """
+        # The weather card is built with the page; updates can arrive before it
+        if getattr(self, 'weather_result_card', None) is None:
+            logger.debug("Skipping weather display update: weather_result_card not built yet")
+            return
             
-            # Update weather display
-            with self.weather_result_card:
-                with ui.row().classes('w-full items-center justify-between'):
-                    ui.label(f"Weather in {weather_data.get('location', {}).get('name', 'Unknown Location')}")
-                    ui.label(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                
-                with ui.row().classes('w-full gap-4 mt-2'):
-                    with ui.card().classes('flex-1 p-4'):
-                        ui.label('Temperature').classes('text-lg font-bold')
-                        temp_c = weather_data.get('temperature')
-                        temp_f = (temp_c * 9/5 + 32) if temp_c is not None else None
-                        ui.label(f"{temp_c if temp_c is not None else 'N/A'}°C / {temp_f if temp_f is not None else 'N/A'}°F")
-                    
-                    with ui.card().classes('flex-1 p-4'):
-                        ui.label('Condition').classes('text-lg font-bold')
-                        ui.label(weather_data.get('description', 'N/A'))
-                    
-                    with ui.card().classes('flex-1 p-4'):
-                        ui.label('Humidity').classes('text-lg font-bold')
-                        ui.label(f"{weather_data.get('humidity', 'N/A')}%")
-                
-                if weather_data.get('air_quality'):
-                    with ui.card().classes('w-full p-4 mt-2'):
-                        ui.label('Air Quality').classes('text-lg font-bold')
-                        with ui.row().classes('w-full gap-4'):
-                            with ui.column().classes('flex-1'):
-                                ui.label('PM2.5').classes('font-bold')
-                                ui.label(f"{weather_data['air_quality'].get('pm2_5', 'N/A')} μg/m³")
-                            with ui.column().classes('flex-1'):
-                                ui.label('PM10').classes('font-bold')
-                                ui.label(f"{weather_data['air_quality'].get('pm10', 'N/A')} μg/m³")
-                            with ui.column().classes('flex-1'):
-                                ui.label('CO').classes('font-bold')
-                                ui.label(f"{weather_data['air_quality'].get('co', 'N/A')} μg/m³")
-                            with ui.column().classes('flex-1'):
-                                ui.label('NO2').classes('font-bold')
-                                ui.label(f"{weather_data['air_quality'].get('no2', 'N/A')} μg/m³")
-                            with ui.column().classes('flex-1'):
-                                ui.label('O3').classes('font-bold')
-                                ui.label(f"{weather_data['air_quality'].get('o3', 'N/A')} μg/m³")
-                
-                # Update simulator with real weather data
-                try:
-                    await self._update_simulation_with_weather(weather_data)
-                except Exception as e:
-                    logger.error(f"Error updating simulation with weather data: {e}")
+        self._ensure_weather_skeleton()
         
-        except Exception as e:
-            logger.error(f"Error updating weather display: {e}")
-            logger.exception("Full traceback:")
-            await self._safe_notify(f'Error updating weather display: {str(e)}', type='negative')
+        # Write only the fields whose text changed; the card layout is built once
+        temp_c = weather_data.get('temperature')
+        temp_f = (temp_c * 9/5 + 32) if temp_c is not None else None
+        fields = {
+            'location': f"Weather in {weather_data.get('location', {}).get('name', 'Unknown Location')}",
+            'time': timestamp_text(int(time_module.time())),
+            'temperature': f"{temp_c if temp_c is not None else 'N/A'}°C / {temp_f if temp_f is not None else 'N/A'}°F",
+            'condition': weather_data.get('description', 'N/A'),
+            'humidity': f"{weather_data.get('humidity', 'N/A')}%",
+        }
+        air_quality = weather_data.get('air_quality')
+        if air_quality:
+            for key, _ in AIR_QUALITY_FIELDS:
+                fields[key] = f"{air_quality.get(key, 'N/A')} μg/m³"
+        
+        changed = [label for label in (self._set_weather_field(name, text) for name, text in fields.items()) if label]
+        # Only show/hide the air quality card when its state flips
+        show_aqi = bool(air_quality)
+        if self._aqi_card.visible != show_aqi:
+            self._aqi_card.visible = show_aqi
+            changed.append(self._aqi_card)
+        
+        # Send every changed element to the client in one update
+        if changed:
+            ui.update(*changed)
+        
+        # Update simulator with real weather data
+        if update_simulation:
+            await self._update_simulation_with_weather(weather_data)
+
+    def _set_weather_field(self, name: str, text: str):
+        """Set a weather card label's text
+        
+        Returns:
+            The label if its text changed, otherwise None
+        """
+        if self._last_weather_fields.get(name) == text:
+            return None
+        self._last_weather_fields[name] = text
+        label = self._weather_labels[name]
+        label.text = text
+        return label
 
     async def _update_simulation_with_weather(self, weather_data: dict):
         """Update simulation with real weather data"""
-        try:
-            # Map weather condition to our enum
-            condition_text = weather_data.get('description', '').lower()
-            weather_mapping = {
-                'sunny': WeatherCondition.SUNNY,
-                'partly cloudy': WeatherCondition.PARTLY_CLOUDY,
-                'cloudy': WeatherCondition.CLOUDY,
-                'overcast': WeatherCondition.OVERCAST,
-                'light rain': WeatherCondition.LIGHT_RAIN,
-                'rain': WeatherCondition.RAINY,
-                'heavy rain': WeatherCondition.HEAVY_RAIN,
-                'thunderstorm': WeatherCondition.STORMY,
-                'light snow': WeatherCondition.LIGHT_SNOW,
-                'snow': WeatherCondition.SNOWY,
-                'heavy snow': WeatherCondition.HEAVY_SNOW,
-                'fog': WeatherCondition.FOGGY,
-                'windy': WeatherCondition.WINDY
-            }
-            
-            # Find best matching weather condition
-            matched_condition = WeatherCondition.SUNNY  # default
-            for key, value in weather_mapping.items():
-                if key in condition_text:
-                    matched_condition = value
-                    break
-            
-            # Update weather select and trigger simulation update
-            # Check if weather_select exists and is not None before using it
-            if hasattr(self, 'weather_select') and self.weather_select is not None:
-                try:
-                    self.weather_select.value = matched_condition.value.replace('_', ' ').title()
-                    await self.weather_select.update()
-                except Exception as e:
-                    logger.error(f"Error updating weather select UI: {e}")
-            
+        await self._apply_weather_update(weather_data, update_env_state=True)
+
+    async def _apply_weather_update(self, weather_data: dict, *, update_env_state: bool) -> WeatherCondition:
+        """Match the reported weather condition, show it in the weather select and record it
+        
+        With update_env_state the simulation state is refreshed as well; otherwise
+        the caller updates the environmental state itself.
+        """
+        # Map weather condition to our enum
+        matched_condition = match_weather_condition(weather_data.get('description', ''))
+        
+        # Update weather select if it has been built
+        if self.weather_select is not None:
+            self.weather_select.value = WEATHER_LABELS[matched_condition]
+            await self.weather_select.update()
+        else:
+            logger.debug("weather_select component not built yet, skipping update")
+        
+        if update_env_state:
             # Update the weather condition regardless of UI component status
             await self._update_weather_condition(matched_condition.value)
-            
-        except Exception as e:
-            logger.error(f"Error updating simulation with weather data: {e}")
-            logger.exception("Full traceback:")
-            await self._safe_notify(f'Error updating simulation with weather data: {str(e)}', type='negative')
+        else:
+            self.current_weather = matched_condition
+        return matched_condition
 
     async def _update_weather_condition(self, condition: str):
-        """Update weather condition and simulation state"""
+        """Update weather condition and simulation state
+        
+        Accepts either a select label (e.g. 'Partly Cloudy') or an enum value.
+        """
         try:
             if condition:
-                self.current_weather = WeatherCondition(condition)
+                self.current_weather = WEATHER_FROM_LABEL.get(condition) or WeatherCondition(condition)
             else:
                 logger.warning("Empty weather condition provided, using default SUNNY")
                 self.current_weather = WeatherCondition.SUNNY
@@ -565,35 +640,48 @@ class SmartHomePage:
             except Exception as inner_e:
                 logger.error(f"Error in fallback simulation state update: {inner_e}")
 
-    def _update_simulation_time(self, time_str: str):
-        """Update simulation time"""
+    async def _update_simulation_time(self, time_str: str):
+        """Update simulation time from an "HH:MM" string"""
         if time_str:
             try:
-                hour, minute = map(int, time_str.split(':'))
-                self._update_simulation_state(time(hour, minute))
+                # Fixed-width "HH:MM": slice instead of split/map
+                if len(time_str) != 5 or time_str[2] != ':':
+                    raise ValueError(f"expected HH:MM, got {time_str!r}")
+                await self._update_simulation_state(time(int(time_str[:2]), int(time_str[3:])))
             except Exception as e:
                 logger.error(f"Error updating simulation time: {e}")
         else:
             # Use current time as fallback
             current_time = datetime.now().time()
-            self._update_simulation_state(current_time)
+            await self._update_simulation_state(current_time)
 
     async def _update_simulation_state(self, custom_time: Optional[time] = None):
         """Update simulation state with new environmental conditions"""
         simulation_time = None
         
         try:
-            # Create simulation time object safely
             current_datetime = datetime.now()
-            simulation_time = SimulationTime(
-                start_time=current_datetime,
-                custom_time=custom_time
-            )
             
             # Check if current_location is valid before proceeding
             if not hasattr(self, 'current_location') or self.current_location is None:
                 logger.warning("Cannot update simulation state: current_location is None")
                 return
+            
+            # Skip when weather, location and (minute-resolution) time are unchanged
+            sim_key = (
+                self.current_weather,
+                self.current_location,
+                custom_time or current_datetime.replace(second=0, microsecond=0)
+            )
+            if sim_key == self._last_sim_key:
+                logger.debug("Simulation state unchanged, skipping update")
+                return
+            
+            # Create simulation time object only once an update is actually needed
+            simulation_time = SimulationTime(
+                start_time=current_datetime,
+                custom_time=custom_time
+            )
                 
             # Get current weather data with error handling
             weather_data = None
@@ -602,8 +690,7 @@ class SmartHomePage:
                     type=LocationType.LATLON,
                     value=f"{self.current_location.latitude},{self.current_location.longitude}"
                 )
-                # Calling get_weather without await since it's not an async function
-                weather_data = self.weather_service.get_weather(weather_query)
+                weather_data = await self._get_cached_weather(weather_query)
             except Exception as network_error:
                 logger.error(f"Error fetching weather data: {network_error}")
                 # Continue with None weather_data
@@ -624,12 +711,14 @@ class SmartHomePage:
                         self.current_location,
                         simulation_time
                     )
+                self._last_sim_key = sim_key
             else:
                 logger.warning("Cannot update simulation state: simulator is None")
             
         except Exception as e:
             logger.error(f"Error updating simulation state: {e}")
             logger.exception("Full traceback:")
+            self._last_sim_key = None
             
             # Attempt minimal fallback if simulation_time was created
             if simulation_time and hasattr(self, 'simulator') and self.simulator is not None:
@@ -643,23 +732,30 @@ class SmartHomePage:
                 except Exception as fallback_error:
                     logger.error(f"Critical error in simulation fallback: {fallback_error}")
 
-    def _update_location_options(self, locations: List[Dict]):
-        """Update location select options"""
+    def _update_location_options(self, locations: List[Dict] = ()):
+        """Update location select options
+        
+        The popular cities always come first and are copied from a prebuilt
+        index; only the search results in ``locations`` are processed here.
+        Search results are already de-duplicated by the weather service.
+        """
+        # Same select and same results as last time (e.g. a cached search): nothing to rebuild
+        if self._options_source == (self.location_search, locations):
+            return
         try:
-            # Keep track of seen locations to avoid duplicates
-            seen = set()
-            self.location_options = {}  # Map display name to location data
-            options = []  # List of display names for select
+            if not locations:
+                # Popular cities only: the lookups are read-only, so share the prebuilt ones
+                self.location_options = POPULAR_LOCATION_OPTIONS
+                self._location_options_ci = POPULAR_LOCATION_OPTIONS_CI
+            else:
+                self.location_options = dict(POPULAR_LOCATION_OPTIONS)  # Map display name to location data
+                self._location_options_ci = dict(POPULAR_LOCATION_OPTIONS_CI)  # Lower-cased display name -> display name
             
             for loc in locations:
-                # Create a unique key for the location
-                key = f"{loc['name']}-{loc['region']}-{loc['country']}"
-                if key in seen:
-                    continue
-                seen.add(key)
-                
-                # Create display name
+                # Create display name, skipping results that repeat a popular city
                 display_name = f"{loc['name']}, {loc['region']}"
+                if display_name in self.location_options:
+                    continue
                 
                 # Store full location data
                 self.location_options[display_name] = {
@@ -668,22 +764,38 @@ class SmartHomePage:
                     'country': loc['country'],
                     'tz_id': loc.get('tz_id', 'UTC')
                 }
-                
-                # Add display name to options
-                options.append(display_name)
+                self._location_options_ci[display_name.lower()] = display_name
             
-            # Update select options
-            logger.debug(f"Setting location options: {options}")
+            # Update select options; the dict keeps insertion order, so the
+            # popular cities stay first without a parallel list
+            options = list(self.location_options)
+            logger.debug("Setting location options: {}", options)
             self.location_search.options = options
+            self._options_source = (self.location_search, locations)
             
         except Exception as e:
             logger.error(f"Error updating location options: {e}")
 
+    def _schedule_location_and_weather_update(self):
+        """Run _update_location_and_weather, coalescing requests made while one is in flight"""
+        if self._location_update_task is not None and not self._location_update_task.done():
+            self._location_update_pending = True
+            return
+        self._location_update_task = asyncio.create_task(self._run_location_and_weather_updates())
+
+    async def _run_location_and_weather_updates(self):
+        """Apply location/weather updates one at a time until no new request is pending"""
+        while True:
+            self._location_update_pending = False
+            await self._update_location_and_weather()
+            if not self._location_update_pending:
+                break
+
     async def _update_location_and_weather(self):
         """Update both weather data and environmental state for new location"""
         try:
             # Get current weather data using the city-based query first
-            current_weather = self.weather_service.get_weather(self._current_location_query, self.include_aqi)
+            current_weather = await self._get_cached_weather(self._current_location_query, self.include_aqi)
             
             if not current_weather and self.current_location:
                 # Fallback to coordinates if city query fails
@@ -691,36 +803,11 @@ class SmartHomePage:
                     type=LocationType.CITY,  # Keep using CITY type instead of LATLON
                     value=f"{self.current_location.region}"  # Just use the region name
                 )
-                current_weather = self.weather_service.get_weather(fallback_query, self.include_aqi)
+                current_weather = await self._get_cached_weather(fallback_query, self.include_aqi)
             
             if current_weather:
-                # Extract weather condition from current weather data
-                condition_text = current_weather.get('description', '').lower()
-                weather_mapping = {
-                    'sunny': WeatherCondition.SUNNY,
-                    'partly cloudy': WeatherCondition.PARTLY_CLOUDY,
-                    'cloudy': WeatherCondition.CLOUDY,
-                    'overcast': WeatherCondition.OVERCAST,
-                    'light rain': WeatherCondition.LIGHT_RAIN,
-                    'rain': WeatherCondition.RAINY,
-                    'heavy rain': WeatherCondition.HEAVY_RAIN,
-                    'thunderstorm': WeatherCondition.STORMY,
-                    'light snow': WeatherCondition.LIGHT_SNOW,
-                    'snow': WeatherCondition.SNOWY,
-                    'heavy snow': WeatherCondition.HEAVY_SNOW,
-                    'fog': WeatherCondition.FOGGY,
-                    'windy': WeatherCondition.WINDY
-                }
-                
-                # Find best matching weather condition
-                matched_condition = WeatherCondition.SUNNY  # default
-                for key, value in weather_mapping.items():
-                    if key in condition_text:
-                        matched_condition = value
-                        break
-                
-                # Update current weather condition
-                self.current_weather = matched_condition
+                # Show and record the reported condition; the environmental state is updated below
+                matched_condition = await self._apply_weather_update(current_weather, update_env_state=False)
                 
                 # Prepare weather data with all necessary fields
                 weather_state = {
@@ -742,41 +829,24 @@ class SmartHomePage:
                 )
                 logger.info(f"Updated environmental state for {self.current_location.region} with weather: {matched_condition.value}, humidity: {weather_state['humidity']}%")
                 
-                # Store the values we need to update in the UI
-                weather_select_value = matched_condition.value.replace('_', ' ').title()
-                weather_display_data = current_weather
-                location_region = self.current_location.region
-                
                 # Update UI elements safely using stored references
-                try:
-                    if hasattr(self, 'weather_select') and self.weather_select is not None:
-                        try:
-                            self.weather_select.value = weather_select_value
-                            await self.weather_select.update()
-                        except Exception as e:
-                            logger.error(f"Error updating weather select component: {e}")
-                    else:
-                        logger.warning("weather_select component not available for update")
-                    
-                    if hasattr(self, 'weather_result_card') and self.weather_result_card is not None:
-                        try:
-                            with self.weather_result_card:
-                                self.weather_result_card.clear()
-                                await self._update_weather_display(weather_display_data)
-                        except Exception as e:
-                            logger.error(f"Error updating weather result card: {e}")
-                    else:
-                        logger.warning("weather_result_card component not available for update")
-                    
-                    # Use a safe notification method that works in background tasks
-                    if hasattr(self, 'weather_result_card') and self.weather_result_card is not None:
-                        try:
-                            with self.weather_result_card:
-                                ui.label(f'Updated to {location_region}').classes('text-positive')
-                        except Exception as e:
-                            logger.error(f"Error adding update notification: {e}")
-                except Exception as e:
-                    logger.error(f"Error updating UI components: {e}")
+                if self.weather_result_card is not None:
+                    try:
+                        # Environmental state was updated above; only refresh the card
+                        await self._update_weather_display(current_weather, update_simulation=False)
+                        # Status line instead of a notification (this may run as a background task);
+                        # only sent when its text or visibility actually changes
+                        status_label = self._weather_labels['status']
+                        changed = self._set_weather_field('status', f'Updated to {self.current_location.region}')
+                        if not status_label.visible:
+                            status_label.visible = True
+                            changed = status_label
+                        if changed:
+                            ui.update(status_label)
+                    except Exception as e:
+                        logger.error(f"Error updating weather result card: {e}")
+                else:
+                    logger.debug("weather_result_card not built yet, skipping display update")
                 
             else:
                 logger.warning("No weather data received for location update")
@@ -792,9 +862,9 @@ class SmartHomePage:
     def _handle_location_select(self, event):
         """Handle location selection"""
         try:
-            logger.debug(f"Location select event: {event}")
-            logger.debug(f"Event args: {event.args}")
-            logger.debug(f"Available options: {self.location_options.keys()}")
+            logger.debug("Location select event: {}", event)
+            logger.debug("Event args: {}", event.args)
+            logger.debug("Available options: {}", self.location_options.keys())
             
             if not event or not event.args:
                 logger.debug("No event or args")
@@ -810,19 +880,15 @@ class SmartHomePage:
                 logger.debug("No display name")
                 return
                 
-            # Try to find a matching location
-            matching_name = None
-            for name in self.location_options.keys():
-                if name.lower() == str(display_name).lower():
-                    matching_name = name
-                    break
+            # Try to find a matching location (case-insensitive)
+            matching_name = self._location_options_ci.get(str(display_name).lower())
                     
             if not matching_name:
                 logger.error(f"No matching location for: {display_name}")
                 return
                 
             location = self.location_options[matching_name]
-            logger.debug(f"Selected location data: {location}")
+            logger.debug("Selected location data: {}", location)
                 
             # Update current location
             self.current_location = Location(
@@ -858,7 +924,7 @@ class SmartHomePage:
             
             # Fetch weather data and update environmental state
             logger.debug("Fetching weather data and updating environmental state for new location")
-            asyncio.create_task(self._update_location_and_weather())
+            self._schedule_location_and_weather_update()
             
         except Exception as e:
             logger.error(f"Error handling location select: {e}")
@@ -866,181 +932,80 @@ class SmartHomePage:
             logger.error('Error selecting location')
 
     async def _handle_location_search(self, event):
-        """Handle location search input for select filtering"""
+        """Handle location search input for select filtering
+        
+        Keystrokes are debounced: only the last query typed within
+        LOCATION_SEARCH_DEBOUNCE seconds is searched. Queries too short to
+        search, or naming a popular city, reset the options to the popular
+        cities right away.
+        """
+        logger.debug("Location search event: {}", event)
+        # event.args[0] is the filter text
+        query = event.args[0] if event.args else ''
+        
+        # Focus/blur and composition events repeat the same filter text
+        normalized_query = ' '.join(query.lower().split())
+        if normalized_query == self._last_search_query:
+            return
+        self._last_search_query = normalized_query
+        
+        if self._search_debounce_task is not None and not self._search_debounce_task.done():
+            self._search_debounce_task.cancel()
+        
+        # Too short to search, or a popular city typed in full (already listed):
+        # nothing to send to the API, so there is nothing to debounce
+        if len(normalized_query) < LOCATION_SEARCH_MIN_LENGTH or normalized_query in POPULAR_CITY_KEYS:
+            self._search_debounce_task = None
+            self.search_results = []
+            self._update_location_options()
+            return
+        
+        self._search_debounce_task = asyncio.create_task(self._do_location_search(query))
+
+    async def _do_location_search(self, query: str):
+        """Search locations for a query once typing has paused"""
         try:
-            logger.debug(f"Location search event: {event}")
-            # event.args[0] is the filter text
-            query = event.args[0] if event.args else ''
-            if query and len(query) >= 3:
-                locations = self.weather_service.search_locations(query)
-                logger.debug(f"Found locations: {locations}")
-                
-                # Store search results and update options
-                self.search_results = locations
-                self._update_location_options(self.popular_cities + locations)
-            else:
-                # If no search query, show only popular cities
-                self.search_results = []
-                self._update_location_options(self.popular_cities)
+            await asyncio.sleep(LOCATION_SEARCH_DEBOUNCE)
+            
+            locations = await self._get_cached_locations(query)
+            logger.debug("Found locations: {}", locations)
+            
+            # Store search results and update options
+            self.search_results = locations
+            self._update_location_options(locations)
                 
+        except asyncio.CancelledError:
+            # Superseded by a newer keystroke
+            raise
         except Exception as e:
             logger.error(f"Error in location search: {e}")
             logger.exception("Full traceback:")
+            # Let the same query be retried
+            self._last_search_query = None
             # Show popular cities on error
             self.search_results = []
-            self._update_location_options(self.popular_cities)
-
-    def _map_weather_condition(self, condition: str) -> WeatherCondition:
-        """Enhanced weather condition mapping with more granular conditions"""
-        condition_lower = condition.lower()
-        
-        condition_mappings = {
-            WeatherCondition.SUNNY: [
-                'sunny', 'clear', 'fine', 'fair', 'bright'
-            ],
-            WeatherCondition.PARTLY_CLOUDY: [
-                'partly cloudy', 'scattered clouds'
-            ],
-            WeatherCondition.CLOUDY: [
-                'cloudy', 'mostly cloudy'
-            ],
-            WeatherCondition.OVERCAST: [
-                'overcast', 'dull'
-            ],
-            WeatherCondition.LIGHT_RAIN: [
-                'light rain', 'drizzle', 'light shower'
-            ],
-            WeatherCondition.RAINY: [
-                'rain', 'shower', 'precipitation'
-            ],
-            WeatherCondition.HEAVY_RAIN: [
-                'heavy rain', 'downpour', 'torrential'
-            ],
-            WeatherCondition.STORMY: [
-                'thunder', 'storm', 'lightning', 'squall'
-            ],
-            WeatherCondition.LIGHT_SNOW: [
-                'light snow', 'sleet', 'light flurries'
-            ],
-            WeatherCondition.SNOWY: [
-                'snow', 'snowfall'
-            ],
-            WeatherCondition.HEAVY_SNOW: [
-                'heavy snow', 'blizzard'
-            ],
-            WeatherCondition.FOGGY: [
-                'fog', 'mist', 'hazy'
-            ],
-            WeatherCondition.WINDY: [
-                'windy', 'blustery', 'gusty'
-            ]
-        }
+            self._update_location_options()
 
-    def _generate_sensor_value(self, sensor: Sensor) -> float:
-        """Enhanced sensor value generation with realistic environmental factors"""
-        base_ranges = {
-            'temperature': {
-                'indoor': (18, 25),   # Indoor temperature range
-                'outdoor': (-10, 40)  # Outdoor temperature range
-            },
-            'humidity': {
-                'indoor': (30, 60),   # Indoor humidity range
-                'outdoor': (20, 100)  # Outdoor humidity range
-            },
-            'light': {
-                'indoor': (0, 500),    # Indoor light level (lux)
-                'outdoor': (0, 100000) # Outdoor light level (lux)
-            },
-            'air_quality': {
-                'indoor': (0, 500),    # Indoor AQI
-                'outdoor': (0, 500)    # Outdoor AQI
-            },
-            'pressure': (980, 1020),  # Atmospheric pressure (hPa)
-            'noise': {
-                'indoor': (30, 70),    # Indoor noise level (dB)
-                'outdoor': (40, 100)   # Outdoor noise level (dB)
-            },
-            'wind_speed': (0, 100),   # Wind speed (km/h)
-            'rain_rate': (0, 100),    # Rain rate (mm/h)
-            'uv_index': (0, 11)       # UV index
-        }
+    async def _get_cached_locations(self, query: str) -> List[Dict]:
+        """Search locations, reusing a recent result for the same normalized query"""
+        # Same normalization as the keystroke de-duplication in _handle_location_search
+        key = ' '.join(query.lower().split())
+        now = time_module.monotonic()
         
-        sensor_type = sensor.type.lower()
-        location_type = 'indoor' if sensor.room and sensor.room.is_indoor else 'outdoor'
+        cached = self._geocode_cache.get(key)
+        if cached and now - cached[0] < LOCATION_SEARCH_CACHE_TTL:
+            self._geocode_cache.move_to_end(key)
+            return cached[1]
         
-        # Get base range for sensor type and location
-        if isinstance(base_ranges[sensor_type], dict):
-            base_min, base_max = base_ranges[sensor_type][location_type]
-        else:
-            base_min, base_max = base_ranges[sensor_type]
-        
-        # Get environmental modifiers
-        env_modifier = get_sensor_value_modifier(self.env_state, sensor_type)
-        weather_impact = WeatherImpactFactors.get_impact_factors(
-            self.current_weather,
-            self.env_state.temperature_celsius,
-            self.env_state.humidity_percent
-        )
-        
-        # Calculate base value with time-based variation
-        hour = self.simulation_time.effective_time.hour
-        time_factor = math.sin((hour - 6) * math.pi / 12)  # Daily cycle
-        base_value = ((base_max - base_min) / 2) * (1 + time_factor) + base_min
-        
-        # Apply modifiers
-        if sensor_type == 'temperature':
-            modified_value = base_value + weather_impact.temperature_modifier
-            if location_type == 'indoor':
-                modified_value = self._adjust_indoor_temperature(modified_value)
-        elif sensor_type == 'humidity':
-            modified_value = base_value + weather_impact.humidity_modifier
-            if location_type == 'indoor':
-                modified_value = self._adjust_indoor_humidity(modified_value)
-        elif sensor_type == 'light':
-            modified_value = base_value * weather_impact.light_level_modifier
-            if location_type == 'indoor':
-                modified_value *= 0.1  # Indoor light levels are typically lower
-        elif sensor_type == 'air_quality':
-            modified_value = base_value + weather_impact.air_quality_modifier
-        else:
-            modified_value = base_value * env_modifier
-        
-        # Add small random variation
-        variation = random.uniform(-0.05, 0.05) * modified_value
-        final_value = modified_value + variation
-        
-        # Ensure value stays within bounds
-        return max(base_min, min(base_max, final_value))
-
-    def _adjust_indoor_temperature(self, outdoor_temp: float) -> float:
-        """Adjust indoor temperature based on outdoor temperature"""
-        target_temp = 22  # Typical indoor target temperature
-        adjustment_factor = 0.2  # How much outdoor temperature affects indoor
-        return target_temp + (outdoor_temp - target_temp) * adjustment_factor
-
-    def _adjust_indoor_humidity(self, outdoor_humidity: float) -> float:
-        """Adjust indoor humidity based on outdoor humidity"""
-        target_humidity = 45  # Typical indoor target humidity
-        adjustment_factor = 0.3  # How much outdoor humidity affects indoor
-        return target_humidity + (outdoor_humidity - target_humidity) * adjustment_factor
-
-    def _get_time_based_variation(self, sensor_type: str) -> float:
-        """Get time-based variation for sensor values"""
-        hour = self.simulation_time.effective_time.hour
-        
-        if sensor_type == 'temperature':
-            # Temperature peaks in afternoon (around 14:00)
-            return 5 * math.sin((hour - 6) * math.pi / 12)
-        elif sensor_type == 'humidity':
-            # Humidity highest in early morning
-            return -10 * math.sin((hour - 4) * math.pi / 12)
-        elif sensor_type == 'light':
-            # Light levels follow sun pattern
-            if 6 <= hour <= 18:  # Daylight hours
-                return 50 * math.sin((hour - 6) * math.pi / 12)
-            return 0  # Night time
-        
-        return 0
+        # search_locations blocks on HTTP, so run it in a worker thread
+        locations = await asyncio.to_thread(self.weather_service.search_locations, query)
+        # Empty results may be a rate limit or outage; don't pin them in the cache
+        if locations:
+            self._geocode_cache[key] = (now, locations)
+            self._geocode_cache.move_to_end(key)
+            while len(self._geocode_cache) > LOCATION_SEARCH_CACHE_MAX_ENTRIES:
+                self._geocode_cache.popitem(last=False)
+        return locations
 
     async def _update_scenario_selection(self, scenario_name):
         """Handle scenario selection without auto-starting"""
@@ -1076,39 +1041,41 @@ class SmartHomePage:
             
             logger.info(f"Processing scenario selection. Final name: {scenario_name}")
             
-            with SessionLocal() as session:
-                # Load the selected scenario with its containers
-                logger.info(f"Querying database for scenario: {scenario_name}")
-                scenario = session.query(Scenario).options(
-                    joinedload(Scenario.containers)
-                ).filter_by(name=scenario_name).first()
+            # Look up the selected scenario (with its containers) in the snapshot
+            scenario = self._scenarios_by_name.get(scenario_name)
+            
+            # Re-selecting the current scenario: nothing to persist or redraw
+            if scenario and self.selected_scenario and self.selected_scenario.name == scenario.name:
+                self.selected_scenario = scenario  # Keep the reference on the latest snapshot
+                logger.debug(f"Scenario {scenario.name} already selected")
+                return
+            
+            if scenario:
+                logger.info(f"Found scenario: {scenario.name} (id: {scenario.id})")
+                self.selected_scenario = scenario
+                logger.opt(lazy=True).debug("Selected scenario containers: {}", lambda: [c.name for c in scenario.containers])
                 
-                if scenario:
-                    logger.info(f"Found scenario in database: {scenario.name} (id: {scenario.id})")
-                    self.selected_scenario = scenario
-                    logger.info(f"Selected scenario containers: {[c.name for c in scenario.containers]}")
-                    
-                    # Store the selected scenario in database for persistence
-                    try:
-                        Option.set_value("selected_scenario", scenario.name)
-                        logger.info(f"Stored scenario selection '{scenario.name}' in database")
-                        
-                        # Update state manager
-                        if self.state_manager:
-                            self.state_manager.set_selected_scenario(scenario)
-                            logger.info(f"Updated selected scenario in state manager: {scenario.name}")
-                    except Exception as e:
-                        logger.error(f"Error storing scenario selection: {str(e)}", exc_info=True)
+                # Store the selected scenario in database for persistence
+                try:
+                    Option.set_value("selected_scenario", scenario.name)
+                    logger.info(f"Stored scenario selection '{scenario.name}' in database")
                     
-                    # Update button state to show 'Start Scenario'
-                    try:
-                        self._update_toggle_button_state()
-                    except Exception as e:
-                        logger.error(f"Error updating toggle button: {str(e)}", exc_info=True)
-                        # Continue without updating the toggle button
-                else:
-                    logger.warning(f"Scenario not found in database: {scenario_name}")
-                    await self._safe_notify("Scenario not found", notification_type='warning')
+                    # Update state manager
+                    if self.state_manager:
+                        self.state_manager.set_selected_scenario(scenario)
+                        logger.info(f"Updated selected scenario in state manager: {scenario.name}")
+                except Exception as e:
+                    logger.error(f"Error storing scenario selection: {str(e)}", exc_info=True)
+                
+                # Update button state to show 'Start Scenario'
+                try:
+                    self._update_toggle_button_state()
+                except Exception as e:
+                    logger.error(f"Error updating toggle button: {str(e)}", exc_info=True)
+                    # Continue without updating the toggle button
+            else:
+                logger.warning(f"Scenario not found: {scenario_name}")
+                await self._safe_notify("Scenario not found", notification_type='warning')
             
         except Exception as e:
             logger.error(f"Error in scenario selection: {str(e)}", exc_info=True)
@@ -1123,27 +1090,27 @@ class SmartHomePage:
             await self._safe_notify("Please select a scenario first", notification_type='warning')
             return
             
-        # Refresh the selected scenario status from the database to ensure we have the latest state
-        with SessionLocal() as session:
-            scenario = session.query(Scenario).get(self.selected_scenario.id)
-            if scenario:
-                self.selected_scenario = scenario
-                logger.info(f"Refreshed scenario from database: {scenario.name} (active: {scenario.is_active})")
-            else:
-                logger.warning(f"Selected scenario {self.selected_scenario.id} no longer exists in database")
-                await self._safe_notify("Selected scenario no longer exists", notification_type='negative')
-                self.selected_scenario = None
-                return
+        # Refresh the selected scenario status from the database to ensure we have the latest state;
+        # the read runs in a worker thread so the event loop is not blocked on the database
+        scenario = await asyncio.to_thread(self._get_scenario, self.selected_scenario.id)
+        if scenario:
+            self.selected_scenario = scenario
+            logger.info(f"Refreshed scenario from database: {scenario.name} (active: {scenario.is_active})")
+        else:
+            logger.warning(f"Selected scenario {self.selected_scenario.id} no longer exists in database")
+            await self._safe_notify("Selected scenario no longer exists", notification_type='negative')
+            self.selected_scenario = None
+            return
         
         try:
             logger.info(f"Current scenario {self.selected_scenario.name} - active state: {self.selected_scenario.is_active}")
 
             if self.selected_scenario.is_active:
                 # If scenario is already active, stop it
-                self._stop_scenario()
+                await self._stop_scenario()
             else:
                 # Otherwise start it
-                self._start_scenario()
+                await self._start_scenario()
                 logger.info(f"Scenario {self.selected_scenario.name} started successfully")
             
             self._update_toggle_button_state()
@@ -1152,6 +1119,11 @@ class SmartHomePage:
             logger.error(f"Error toggling scenario: {str(e)}", exc_info=True)
             await self._safe_notify(f"Error toggling scenario: {str(e)}", notification_type='negative')
 
+    def _get_scenario(self, scenario_id):
+        """Load a scenario by id in its own session; safe to call from a worker thread"""
+        with self._session_factory() as session:
+            return session.get(Scenario, scenario_id)
+
     async def _safe_notify(self, message, notification_type='info'):
         """Safely show notifications that works in any context"""
         try:
@@ -1172,180 +1144,240 @@ class SmartHomePage:
 
     def _update_toggle_button_state(self):
         """Update toggle button state based on selected scenario"""
-        try:
-            if not hasattr(self, 'scenario_toggle') or self.scenario_toggle is None:
-                # Toggle button doesn't exist yet, do nothing
-                logger.info("Toggle button doesn't exist yet, skipping update")
-                return
-                
-            if not self.selected_scenario:
-                # No scenario selected
-                logger.info("No scenario selected, disabling toggle button")
-                self.scenario_toggle.text = 'Select Scenario First'
-                # Update properties individually to avoid string parsing issues
-                self.scenario_toggle.props(remove='color icon disabled')
-                self.scenario_toggle.props('color=grey')
-                self.scenario_toggle.props('icon=play_arrow')
-                self.scenario_toggle.props('disabled=true')
-                return
-                
-            # Check if scenario is active
-            is_active = False
-            try:
-                is_active = bool(self.selected_scenario.is_active)
-                logger.info(f"Raw is_active value: {is_active} (type: {type(is_active)})")
-            except Exception as e:
-                logger.error(f"Error getting is_active status: {e}")
-                
-            logger.info(f"Updating toggle button for scenario: {self.selected_scenario.name}, active: {is_active}")
-            
-            if is_active:
-                # Scenario is active, button should stop it
-                logger.info("Scenario is active, setting Stop button")
-                self.scenario_toggle.text = 'Stop Scenario'
-                # Update properties individually
-                logger.debug("Updating toggle button properties to stop state")
-                self.scenario_toggle.props(remove='color icon disabled')
-                self.scenario_toggle.props('color=red')
-                self.scenario_toggle.props('icon=stop')
-                self.scenario_toggle.classes('bg-red-500', remove=False)
-                self.scenario_toggle.classes('bg-blue-500', remove=True)
-                
-                # Update active scenario label
-                if hasattr(self, 'active_scenario_label') and self.active_scenario_label is not None:
-                    logger.debug(f"Updating active scenario label to: {self.selected_scenario.name}")
-                    self.active_scenario_label.text = self.selected_scenario.name
-            else:
-                # Scenario is not active, button should start it
-                logger.info("Scenario is not active, setting Start button")
-                self.scenario_toggle.text = 'Start Scenario'
-                # Update properties individually
-                logger.debug("Updating toggle button properties to start state")
-                self.scenario_toggle.props(remove='color icon disabled')
-                self.scenario_toggle.props('color=blue')
-                self.scenario_toggle.props('icon=play_arrow')
-                self.scenario_toggle.classes('bg-blue-500', remove=False)
-                self.scenario_toggle.classes('bg-red-500', remove=True)
-                # Enable the button since we now have a scenario selected
-                self.scenario_toggle.props('disabled=false')
-        except Exception as e:
-            logger.error(f"Error in _update_toggle_button_state: {str(e)}", exc_info=True)
-            # Don't rethrow to prevent UI disruption
+        if not hasattr(self, 'scenario_toggle') or self.scenario_toggle is None:
+            # Toggle button doesn't exist yet, do nothing
+            logger.debug("Toggle button doesn't exist yet, skipping update")
+            return
+            
+        if not self.selected_scenario:
+            # No scenario selected
+            logger.debug("No scenario selected, disabling toggle button")
+            self.scenario_toggle.text = 'Select Scenario First'
+            # Update properties individually to avoid string parsing issues
+            self.scenario_toggle.props(remove='color icon disabled')
+            self.scenario_toggle.props('color=grey')
+            self.scenario_toggle.props('icon=play_arrow')
+            self.scenario_toggle.props('disabled=true')
+            return
+            
+        # Check if scenario is active
+        is_active = bool(self.selected_scenario.is_active)
+        logger.debug("Updating toggle button for scenario: {}, active: {}", self.selected_scenario.name, is_active)
+        
+        if is_active:
+            # Scenario is active, button should stop it
+            logger.debug("Scenario is active, setting Stop button")
+            self.scenario_toggle.text = 'Stop Scenario'
+            # Update properties individually
+            logger.debug("Updating toggle button properties to stop state")
+            self.scenario_toggle.props(remove='color icon disabled')
+            self.scenario_toggle.props('color=red')
+            self.scenario_toggle.props('icon=stop')
+            self.scenario_toggle.classes('bg-red-500', remove=False)
+            self.scenario_toggle.classes('bg-blue-500', remove=True)
+            
+            # Update active scenario label
+            if hasattr(self, 'active_scenario_label') and self.active_scenario_label is not None:
+                logger.debug(f"Updating active scenario label to: {self.selected_scenario.name}")
+                self.active_scenario_label.text = self.selected_scenario.name
+        else:
+            # Scenario is not active, button should start it
+            logger.debug("Scenario is not active, setting Start button")
+            self.scenario_toggle.text = 'Start Scenario'
+            # Update properties individually
+            logger.debug("Updating toggle button properties to start state")
+            self.scenario_toggle.props(remove='color icon disabled')
+            self.scenario_toggle.props('color=blue')
+            self.scenario_toggle.props('icon=play_arrow')
+            self.scenario_toggle.classes('bg-blue-500', remove=False)
+            self.scenario_toggle.classes('bg-red-500', remove=True)
+            # Enable the button since we now have a scenario selected
+            self.scenario_toggle.props('disabled=false')
 
-    def _start_scenario(self):
-        """Start the selected scenario"""
+    async def _start_scenario(self):
+        """Start the selected scenario
+        
+        The database work runs in a worker thread (see _activate_scenario);
+        the floor plan and labels are updated here, on the event loop.
+        """
         try:
-            with SessionLocal() as session:
-                # First, deactivate all currently active scenarios and their containers
-                active_scenarios = session.query(Scenario).filter_by(is_active=True).all()
-                for active_scenario in active_scenarios:
-                    if active_scenario.id != self.selected_scenario.id:
-                        logger.info(f"Deactivating previous scenario: {active_scenario.name}")
-                        # Deactivate containers
-                        for container in active_scenario.containers:
-                            container.is_active = False
-                            self.floor_plan.update_container_state(container.id, is_active=False)
-                        # Deactivate scenario
-                        active_scenario.is_active = False
-                
-                # Eager load containers and their devices for the selected scenario
-                scenario = session.query(Scenario).options(
-                    joinedload(Scenario.containers).joinedload(Container.devices)
-                ).get(self.selected_scenario.id)
-                
-                if not scenario:
-                    raise ValueError(f"Scenario {self.selected_scenario.id} not found")
-                
-                # Activate only the selected scenario
-                scenario.is_active = True
-                scenario.activate()
-                session.commit()  # Commit the activation
-                
-                # Refresh scenario state after activation
-                session.refresh(scenario)
-                self.selected_scenario = scenario
-                self.active_scenario = scenario
-
-                # Update active containers in the UI
-                for container in scenario.containers:
-                    container.is_active = True  # Mark as active in the database
-                    logger.info(f"Container activated: {container.name}")
-                    # Update the UI for the active container
-                    self.floor_plan.update_container_state(container.id, is_active=True)
-                
-                # Update active scenario label
-                if hasattr(self, 'active_scenario_label') and self.active_scenario_label is not None:
-                    logger.debug(f"Updating active scenario label to: {scenario.name}")
-                    self.active_scenario_label.text = scenario.name
+            scenario, stopped_container_ids, scenarios = await asyncio.to_thread(
+                self._activate_scenario, self.selected_scenario.id
+            )
+            
+            # Containers of the previously active scenarios were deactivated
+            for container_id in stopped_container_ids:
+                self.floor_plan.update_container_state(container_id, is_active=False)
+            
+            # Re-sync the scenario snapshot; it includes the committed scenario
+            self._set_scenarios(scenarios)
+            self.selected_scenario = scenario
+            self.active_scenario = scenario
 
-                # Notify the state manager about the scenario change if available
-                if self.state_manager:
-                    logger.info(f"Notifying state manager about scenario activation: {scenario.id}")
-                    self.state_manager.notify_scenario_changed(scenario.id)
+            # Update active containers in the UI
+            for container in scenario.containers:
+                logger.info(f"Container activated: {container.name}")
+                # Update the UI for the active container
+                self.floor_plan.update_container_state(container.id, is_active=True)
+            
+            # Update active scenario label
+            if hasattr(self, 'active_scenario_label') and self.active_scenario_label is not None:
+                logger.debug(f"Updating active scenario label to: {scenario.name}")
+                self.active_scenario_label.text = scenario.name
+
+            # Notify the state manager about the scenario change if available
+            if self.state_manager:
+                logger.info(f"Notifying state manager about scenario activation: {scenario.id}")
+                self.state_manager.notify_scenario_changed(scenario.id)
 
-                logger.info("Scenario started successfully")
+            logger.info("Scenario started successfully")
             
         except Exception as e:
             logger.error(f"Error starting scenario: {e}", exc_info=True)
             logger.exception("Detailed error trace:")
             # Don't re-raise the exception to prevent cascading errors
 
-    def _stop_scenario(self):
-        """Stop the selected scenario"""
+    def _activate_scenario(self, selected_id):
+        """Activate a scenario and deactivate the others in one transaction
+        
+        Safe to call from a worker thread: it only touches the database and the
+        simulator, never the UI.
+        
+        Returns:
+            The activated scenario, the ids of the containers that were
+            deactivated, and the reloaded scenario snapshot
+        """
+        with self._session_factory() as session:
+            # First, deactivate all currently active scenarios and their containers
+            active_scenarios = session.query(Scenario).options(
+                selectinload(Scenario.containers)
+            ).filter(
+                Scenario.is_active == True,
+                Scenario.id != selected_id
+            ).all()
+            stopped_container_ids = []
+            for active_scenario in active_scenarios:
+                logger.info(f"Deactivating previous scenario: {active_scenario.name}")
+                # Deactivate containers
+                for container in active_scenario.containers:
+                    container.is_active = False
+                    stopped_container_ids.append(container.id)
+            
+            # Deactivate the previous scenarios and activate the selected one
+            # with a single UPDATE
+            session.execute(
+                update(Scenario)
+                .where(or_(Scenario.is_active == True, Scenario.id == selected_id))
+                .values(is_active=case((Scenario.id == selected_id, True), else_=False))
+                .execution_options(synchronize_session=False)
+            )
+            
+            # Eager load containers, devices and sensors for the selected scenario;
+            # activate() walks all three to start the simulations
+            scenario = session.get(
+                Scenario, selected_id,
+                options=[
+                    selectinload(Scenario.containers)
+                    .selectinload(Container.devices)
+                    .selectinload(Device.sensors)
+                ]
+            )
+            
+            if not scenario:
+                raise ValueError(f"Scenario {selected_id} not found")
+            
+            # Start the selected scenario's containers (is_active was set by the UPDATE)
+            scenario.activate()
+            
+            # Single commit for the deactivations and the activation
+            session.commit()
+            
+            return scenario, stopped_container_ids, self._query_scenarios(session)
+
+    async def _stop_scenario(self):
+        """Stop the selected scenario
+        
+        The database work runs in a worker thread (see _deactivate_active_scenario);
+        the floor plan and labels are updated here, on the event loop.
+        """
         try:
             logger.info("Attempting to stop the selected scenario.")
-            with SessionLocal() as session:
-                if self.active_scenario:
-                    logger.info(f"Stopping scenario: {self.active_scenario.name} (ID: {self.active_scenario.id})")
-                else:
-                    logger.info("No active scenario to stop")
-                    return
-
-                # First deactivate any currently active scenarios
-                active_scenario = session.query(Scenario).filter_by(is_active=True).first()
-                if active_scenario:
-                    logger.info(f"Stopping scenario: {active_scenario.name} (ID: {active_scenario.id})")
-                    
-                    # First deactivate all containers
-                    for container in active_scenario.containers:
-                        try:
-                            logger.debug(f"Deactivating container: {container.name} (ID: {container.id})")
-                            
-                            # Update container status in DB
-                            container.is_active = False
-                            session.flush()  # Flush changes to get updated state
-                            
-                            # Update container status in UI
-                            logger.info(f"Container {container.name} deactivated")
-                            self.floor_plan.update_container_state(container.id, is_active=False)
-                        except Exception as container_e:
-                            logger.error(f"Error deactivating container {container.name}: {container_e}")
-                    
-                    # Then deactivate the scenario itself
-                    active_scenario.is_active = False
-                    active_scenario.deactivate()
-                    session.commit()
-                    
-                    # Update UI
-                    if hasattr(self, 'active_scenario_label') and self.active_scenario_label is not None:
-                        self.active_scenario_label.text = 'None'
-                    
-                    # Clear the active scenario reference
-                    self.active_scenario = None
-                    
-                    logger.info(f"Scenario {active_scenario.name} stopped successfully")
-                    
-                    # Notify the state manager about the scenario change if available
-                    if self.state_manager:
-                        logger.info(f"Notifying state manager about scenario deactivation")
-                        self.state_manager.notify_scenario_changed(None)
-                else:
-                    logger.warning("No active scenario found to stop")
+            if self.active_scenario:
+                logger.info(f"Stopping scenario: {self.active_scenario.name} (ID: {self.active_scenario.id})")
+            else:
+                logger.info("No active scenario to stop")
+                return
+            
+            result = await asyncio.to_thread(self._deactivate_active_scenario)
+            if result is None:
+                logger.warning("No active scenario found to stop")
+                return
+            stopped_scenario, stopped_container_ids, scenarios = result
+            
+            # Update container status in UI
+            for container_id in stopped_container_ids:
+                self.floor_plan.update_container_state(container_id, is_active=False)
+            
+            # Update UI
+            if hasattr(self, 'active_scenario_label') and self.active_scenario_label is not None:
+                self.active_scenario_label.text = 'None'
+            
+            # Clear the active scenario reference; a selected stopped scenario takes the new state
+            self.active_scenario = None
+            if self.selected_scenario and self.selected_scenario.id == stopped_scenario.id:
+                self.selected_scenario = stopped_scenario
+            
+            # Re-sync the scenario snapshot now that activation states changed
+            self._set_scenarios(scenarios)
+            
+            logger.info(f"Scenario {stopped_scenario.name} stopped successfully")
+            
+            # Notify the state manager about the scenario change if available
+            if self.state_manager:
+                logger.info(f"Notifying state manager about scenario deactivation")
+                self.state_manager.notify_scenario_changed(None)
         
         except Exception as e:
             logger.error(f"Error stopping scenario: {e}", exc_info=True)
             # Don't re-raise to prevent cascading errors
 
+    def _deactivate_active_scenario(self):
+        """Deactivate the active scenario and its containers in one transaction
+        
+        Safe to call from a worker thread: it only touches the database and the
+        simulator, never the UI.
+        
+        Returns:
+            None if no scenario is active, otherwise the stopped scenario, the
+            ids of its containers and the reloaded scenario snapshot
+        """
+        with self._session_factory() as session:
+            # deactivate() walks the scenario's containers, devices and sensors,
+            # so load them in the same pass
+            active_scenario = session.query(Scenario).options(
+                selectinload(Scenario.containers)
+                .selectinload(Container.devices)
+                .selectinload(Device.sensors)
+            ).filter_by(is_active=True).first()
+            if not active_scenario:
+                return None
+            
+            logger.info(f"Stopping scenario: {active_scenario.name} (ID: {active_scenario.id})")
+            
+            # First deactivate all containers
+            stopped_container_ids = []
+            for container in active_scenario.containers:
+                logger.debug(f"Deactivating container: {container.name} (ID: {container.id})")
+                container.is_active = False
+                stopped_container_ids.append(container.id)
+            
+            # Then deactivate the scenario itself
+            active_scenario.is_active = False
+            active_scenario.deactivate()
+            session.commit()
+            
+            return active_scenario, stopped_container_ids, self._query_scenarios(session)
+
     def _build_scenario_controls(self):
         """Build scenario selection and control section"""
         with ui.card().classes('w-full p-4'):
@@ -1357,7 +1389,7 @@ class SmartHomePage:
             # Then show the controls
             with ui.row().classes('items-center gap-4'):
                 # Create scenario select with increased width
-                logger.debug(f"Building scenario select with options: {self.scenario_options}")
+                logger.debug("Building scenario select with options: {}", self.scenario_options)
                 
                 self.scenario_select = ui.select(
                     label="Select Scenario",
@@ -1376,18 +1408,15 @@ class SmartHomePage:
                         self.scenario_select.value = stored_scenario_name
                         
                         # Update the selected scenario object
-                        with SessionLocal() as session:
-                            scenario = session.query(Scenario).options(
-                                joinedload(Scenario.containers)
-                            ).filter_by(name=stored_scenario_name).first()
-                            
-                            if scenario:
-                                logger.info(f"Loaded previously selected scenario: {scenario.name}")
-                                self.selected_scenario = scenario
-                                # Update button state after a short delay to ensure UI is ready
-                                ui.timer(0.5, lambda: self._update_toggle_button_state(), once=True)
-                            else:
-                                logger.warning(f"Stored scenario name '{stored_scenario_name}' not found in database")
+                        scenario = self._scenarios_by_name.get(stored_scenario_name)
+                        
+                        if scenario:
+                            logger.info(f"Loaded previously selected scenario: {scenario.name}")
+                            self.selected_scenario = scenario
+                            # Update button state after a short delay to ensure UI is ready
+                            ui.timer(0.5, lambda: self._update_toggle_button_state(), once=True)
+                        else:
+                            logger.warning(f"Stored scenario name '{stored_scenario_name}' not found in database")
                 except Exception as e:
                     logger.error(f"Error loading previous scenario selection: {str(e)}", exc_info=True)
                 
@@ -1427,8 +1456,11 @@ class SmartHomePage:
     def _handle_toggle_click(self):
         """Handle toggle button click in a safe way that preserves context"""
         try:
-            # Create a task but don't wait for it
-            asyncio.create_task(self._toggle_scenario())
+            # Ignore clicks while the previous start/stop is still running
+            if self._toggle_task is not None and not self._toggle_task.done():
+                logger.debug("Scenario toggle already in progress")
+                return
+            self._toggle_task = asyncio.create_task(self._toggle_scenario())
         except Exception as e:
             logger.error(f"Error handling toggle button click: {str(e)}")
 
@@ -1444,13 +1476,12 @@ class SmartHomePage:
 
     def _build_location_type_selection(self):
         """Build location type selection dropdown"""
-        location_type_options = [t.value.title() for t in LocationType]
         with ui.row().classes('items-start gap-4 flex-wrap'):
             with ui.column().classes('flex-1'):
                 self.location_type_select = ui.select(
                     label='Location Type',
-                    options=location_type_options,
-                    value=location_type_options[0],
+                    options=list(LOCATION_TYPE_OPTIONS),
+                    value=LOCATION_TYPE_OPTIONS[0],
                 ).props('outlined dense').classes('w-64')
                 self.location_type_select.on('update:model-value', 
                                                lambda e: self._handle_location_type_change(e))
@@ -1469,14 +1500,14 @@ class SmartHomePage:
         """Build city search input"""
         with ui.column().classes('flex-1').bind_visibility_from(
             self.location_type_select, 'value',
-            lambda v: v and v.lower() == LocationType.CITY.value.lower()):
+            location_type_visibility(LocationType.CITY)):
             self.location_search = ui.select(
                 label='Search City',
                 options=[],
                 with_input=True,
             ).props('outlined dense').classes('w-96')
             self.search_results = []
-            self._update_location_options(self.popular_cities)
+            self._update_location_options()
             
             # Set the last selected city if available from state manager
             if self.state_manager:
@@ -1503,7 +1534,7 @@ class SmartHomePage:
                         )
                         
                         # Fetch weather for the saved location
-                        asyncio.create_task(self._update_location_and_weather())
+                        self._schedule_location_and_weather_update()
             
             self.location_search.on('filter', self._handle_location_search)
             self.location_search.on('update:model-value', self._handle_location_select)
@@ -1512,7 +1543,7 @@ class SmartHomePage:
         """Build latitude and longitude inputs"""
         with ui.column().classes('flex-1').bind_visibility_from(
             self.location_type_select, 'value',
-            lambda v: v and v.lower() == LocationType.LATLON.value.lower()):
+            location_type_visibility(LocationType.LATLON)):
             with ui.row().classes('gap-4'):
                 self.latitude_input = ui.number(
                     label='Latitude',
@@ -1533,7 +1564,7 @@ class SmartHomePage:
         """Build postcode input"""
         with ui.column().classes('flex-1').bind_visibility_from(
             self.location_type_select, 'value',
-            lambda v: v and v.lower() == LocationType.POSTCODE.value.lower()):
+            location_type_visibility(LocationType.POSTCODE)):
             self.postcode_input = ui.input(
                 label='Postal Code'
             ).props('outlined dense').classes('w-48')
@@ -1542,7 +1573,7 @@ class SmartHomePage:
         """Build IATA code input"""
         with ui.column().classes('flex-1').bind_visibility_from(
             self.location_type_select, 'value',
-            lambda v: v and v.lower() == LocationType.IATA.value.lower()):
+            location_type_visibility(LocationType.IATA)):
             self.iata_input = ui.input(
                 label='IATA Code'
             ).props('outlined dense').classes('w-48')
@@ -1551,7 +1582,7 @@ class SmartHomePage:
         """Build METAR code input"""
         with ui.column().classes('flex-1').bind_visibility_from(
             self.location_type_select, 'value',
-            lambda v: v and v.lower() == LocationType.METAR.value.lower()):
+            location_type_visibility(LocationType.METAR)):
             self.metar_input = ui.input(
                 label='METAR Code'
             ).props('outlined dense').classes('w-48')
@@ -1560,7 +1591,7 @@ class SmartHomePage:
         """Build IP address input"""
         with ui.column().classes('flex-1').bind_visibility_from(
             self.location_type_select, 'value',
-            lambda v: v and v.lower() == LocationType.IP.value.lower()):
+            location_type_visibility(LocationType.IP)):
             self.ip_input = ui.input(
                 label='IP Address (leave empty for auto)'
             ).props('outlined dense').classes('w-64')
@@ -1568,8 +1599,46 @@ class SmartHomePage:
     def _build_weather_result_card(self):
         """Build weather result card"""
         self.weather_result_card = ui.card().classes('w-full p-4 mt-4')
+        self._weather_details = None  # Built by _ensure_weather_skeleton on first data
+        self._weather_labels = {}
+        self._last_weather_fields = {}
+        with self.weather_result_card:
+            with ui.row().classes('w-full items-center justify-between'):
+                ui.label('Weather Data').classes('text-h6 mb-2')
+                # Bypass the response cache for the current location
+                ui.button(icon='refresh', on_click=lambda: self._fetch_weather_data(force_refresh=True)).props('flat dense')
+
+    def _ensure_weather_skeleton(self):
+        """Build the weather card body once, the first time weather data arrives
+        
+        Later refreshes only rewrite label text (see _update_weather_display).
+        """
+        if self._weather_details is not None:
+            return
         with self.weather_result_card:
-            ui.label('Weather Data').classes('text-h6 mb-2')
+            self._weather_details = ui.column().classes('w-full gap-0')
+            with self._weather_details:
+                with ui.row().classes('w-full items-center justify-between'):
+                    self._weather_labels['location'] = ui.label()
+                    self._weather_labels['time'] = ui.label()
+                
+                with ui.row().classes('w-full gap-4 mt-2'):
+                    for name, title in (('temperature', 'Temperature'), ('condition', 'Condition'), ('humidity', 'Humidity')):
+                        with ui.card().classes('flex-1 p-4'):
+                            ui.label(title).classes('text-lg font-bold')
+                            self._weather_labels[name] = ui.label()
+                
+                self._aqi_card = ui.card().classes('w-full p-4 mt-2')
+                with self._aqi_card:
+                    ui.label('Air Quality').classes('text-lg font-bold')
+                    with ui.row().classes('w-full gap-4'):
+                        for key, title in AIR_QUALITY_FIELDS:
+                            with ui.column().classes('flex-1'):
+                                ui.label(title).classes('font-bold')
+                                self._weather_labels[key] = ui.label()
+            
+            self._weather_labels['status'] = ui.label().classes('text-positive')
+            self._weather_labels['status'].set_visibility(False)
 
     def _build_floor_plan(self):
         """Build floor plan visualization section"""
@@ -1581,8 +1650,7 @@ class SmartHomePage:
     def build(self):
         """Build the smart home page UI"""
         with ui.column().classes('w-full max-w-6xl mx-auto p-4 gap-4'):
-            # Load data before building UI
-            self._load_initial_data()
+            # Data was already loaded by _initialize_simulation in __init__
             
             # Build UI components
             self._build_scenario_controls()
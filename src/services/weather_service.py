@@ -1,5 +1,6 @@
 """Weather service to fetch real weather data"""
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from typing import Dict, Optional, Union, List
 from loguru import logger
@@ -7,6 +8,45 @@ import os
 from src.models.environmental_factors import WeatherCondition
 from dataclasses import dataclass
 from enum import Enum
+from collections import OrderedDict
+from threading import Lock
+from functools import lru_cache
+
+# Maximum number of responses kept for HTTP revalidation (ETag / Last-Modified)
+CONDITIONAL_CACHE_MAX_ENTRIES = 128
+REQUEST_TIMEOUT = 5  # Seconds to wait for the weather API
+
+# One keep-alive connection pool shared by every WeatherService instance, so
+# weather and search calls reuse open connections instead of reconnecting
+_http_session = requests.Session()
+_http_session.mount('http://', HTTPAdapter(pool_maxsize=10))
+_http_session.mount('https://', HTTPAdapter(pool_maxsize=10))
+
+# WeatherAPI.com condition keywords, checked in order; the first match wins
+CONDITION_KEYWORDS = tuple(
+    (keyword, condition)
+    for condition, keywords in (
+        (WeatherCondition.SUNNY, ('sunny', 'clear', 'fine', 'fair', 'bright')),
+        (WeatherCondition.CLOUDY, ('cloudy', 'overcast', 'mist', 'fog', 'hazy', 'partly cloudy')),
+        (WeatherCondition.RAINY, ('rain', 'drizzle', 'shower', 'precipitation', 'wet')),
+        (WeatherCondition.STORMY, ('thunder', 'storm', 'lightning', 'squall', 'tornado', 'hurricane', 'cyclone')),
+        (WeatherCondition.SNOWY, ('snow', 'sleet', 'blizzard', 'ice', 'frost', 'freezing'))
+    )
+    for keyword in keywords
+)
+
+@lru_cache(maxsize=256)
+def match_condition_keyword(condition_lower: str) -> Optional[WeatherCondition]:
+    """First condition, in CONDITION_KEYWORDS priority order, with a keyword in the text
+    
+    WeatherAPI reports conditions from a small fixed vocabulary, so each
+    distinct text is scanned only once.
+    """
+    return next((condition for keyword, condition in CONDITION_KEYWORDS if keyword in condition_lower), None)
+
+def close_http_session():
+    """Close the shared HTTP connection pool"""
+    _http_session.close()
 
 class LocationType(Enum):
     """Types of location queries supported by WeatherAPI"""
@@ -48,6 +88,15 @@ class WeatherService:
         self.base_url = "http://api.weatherapi.com/v1"
         self.rate_limit_remaining = None
         self.rate_limit_reset = None
+        # (url, query params) -> (etag, last_modified, json body), for conditional requests
+        self._conditional_cache = OrderedDict()
+        # Requests run in worker threads (asyncio.to_thread), so guard the cache
+        self._cache_lock = Lock()
+        
+    def clear(self):
+        """Clear cached responses used for conditional requests"""
+        with self._cache_lock:
+            self._conditional_cache.clear()
         
     def _validate_location_query(self, location_query: LocationQuery) -> bool:
         """Validate location query parameters"""
@@ -77,6 +126,59 @@ class WeatherService:
         except (ValueError, TypeError) as e:
             logger.error(f"Error parsing rate limit headers: {str(e)}")
             
+    def _request_json(self, url: str, params: Dict):
+        """GET a JSON resource, revalidating cached bodies with ETag / Last-Modified
+        
+        Returns the decoded JSON body, or None for auth and rate limit errors.
+        """
+        # The API key is the same for every request, so leave it out of the cache key
+        cache_key = (url, tuple(sorted((k, v) for k, v in params.items() if k != 'key')))
+        with self._cache_lock:
+            cached = self._conditional_cache.get(cache_key)
+        
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
+        response = _http_session.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+        self._handle_rate_limits(response)
+        
+        # Handle common HTTP errors
+        if response.status_code == 304 and cached:
+            with self._cache_lock:
+                if cache_key in self._conditional_cache:
+                    self._conditional_cache.move_to_end(cache_key)
+            logger.debug(f"Reusing cached response for {url} (not modified)")
+            return cached[2]
+        elif response.status_code == 401:
+            logger.error("Invalid WeatherAPI key")
+            return None
+        elif response.status_code == 403:
+            logger.error("API key has expired or been disabled")
+            return None
+        elif response.status_code == 429:
+            logger.error("Rate limit exceeded")
+            return None
+            
+        response.raise_for_status()
+        body = response.json()
+        
+        # Remember validators so the next request can be answered with a 304
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            with self._cache_lock:
+                self._conditional_cache[cache_key] = (etag, last_modified, body)
+                self._conditional_cache.move_to_end(cache_key)
+                while len(self._conditional_cache) > CONDITIONAL_CACHE_MAX_ENTRIES:
+                    self._conditional_cache.popitem(last=False)
+        
+        return body
+            
     def get_weather(self, location_query: LocationQuery, include_aqi: bool = True) -> Optional[Dict]:
         """Get current weather for location"""
         if not self.api_key:
@@ -96,22 +198,9 @@ class WeatherService:
                 'aqi': 'yes' if include_aqi else 'no'
             }
             
-            response = requests.get(url, params=params)
-            self._handle_rate_limits(response)
-            
-            # Handle common HTTP errors
-            if response.status_code == 401:
-                logger.error("Invalid WeatherAPI key")
-                return None
-            elif response.status_code == 403:
-                logger.error("API key has expired or been disabled")
-                return None
-            elif response.status_code == 429:
-                logger.error("Rate limit exceeded")
+            weather_data = self._request_json(url, params)
+            if weather_data is None:
                 return None
-                
-            response.raise_for_status()
-            weather_data = response.json()
             
             # Extract relevant data
             current = weather_data['current']
@@ -161,33 +250,29 @@ class WeatherService:
                 'q': query
             }
             
-            response = requests.get(url, params=params)
-            self._handle_rate_limits(response)
-            
-            # Handle common HTTP errors
-            if response.status_code == 401:
-                logger.error("Invalid WeatherAPI key")
-                return []
-            elif response.status_code == 403:
-                logger.error("API key has expired or been disabled")
-                return []
-            elif response.status_code == 429:
-                logger.error("Rate limit exceeded")
+            locations = self._request_json(url, params)
+            if locations is None:
                 return []
-                
-            response.raise_for_status()
-            locations = response.json()
             
-            return [{
-                'id': loc['id'],
-                'name': loc['name'],
-                'region': loc['region'],
-                'country': loc['country'],
-                'lat': loc['lat'],
-                'lon': loc['lon'],
-                'url': loc['url'],
-                'tz_id': loc.get('tz_id')  # Add timezone ID
-            } for loc in locations]
+            # De-duplicate once per fetch so callers can trust the list
+            results = []
+            seen = set()
+            for loc in locations:
+                key = (loc['name'], loc['region'], loc['country'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                results.append({
+                    'id': loc['id'],
+                    'name': loc['name'],
+                    'region': loc['region'],
+                    'country': loc['country'],
+                    'lat': loc['lat'],
+                    'lon': loc['lon'],
+                    'url': loc['url'],
+                    'tz_id': loc.get('tz_id')  # Add timezone ID
+                })
+            return results
             
         except Exception as e:
             logger.error(f"Error searching locations: {str(e)}")
@@ -195,32 +280,11 @@ class WeatherService:
             
     def _map_weather_condition(self, condition: str) -> WeatherCondition:
         """Map WeatherAPI.com conditions to our WeatherCondition enum"""
-        condition_lower = condition.lower()
-        
-        # Mapping dictionary for better organization and maintainability
-        condition_mappings = {
-            WeatherCondition.SUNNY: [
-                'sunny', 'clear', 'fine', 'fair', 'bright'
-            ],
-            WeatherCondition.CLOUDY: [
-                'cloudy', 'overcast', 'mist', 'fog', 'hazy', 'partly cloudy'
-            ],
-            WeatherCondition.RAINY: [
-                'rain', 'drizzle', 'shower', 'precipitation', 'wet'
-            ],
-            WeatherCondition.STORMY: [
-                'thunder', 'storm', 'lightning', 'squall', 'tornado', 'hurricane', 'cyclone'
-            ],
-            WeatherCondition.SNOWY: [
-                'snow', 'sleet', 'blizzard', 'ice', 'frost', 'freezing'
-            ]
-        }
-        
         # Find matching weather condition
-        for weather_type, keywords in condition_mappings.items():
-            if any(keyword in condition_lower for keyword in keywords):
-                logger.debug(f"Mapped condition '{condition}' to {weather_type.value}")
-                return weather_type
+        weather_type = match_condition_keyword(condition.lower())
+        if weather_type is not None:
+            logger.debug("Mapped condition '{}' to {}", condition, weather_type.value)
+            return weather_type
         
         # Log unknown condition and default to cloudy
         logger.warning(f"Unknown weather condition '{condition}', defaulting to CLOUDY")
@@ -78,6 +78,8 @@ class EventSystem:
         # Initialize handlers regardless of initialization state
         # to avoid race conditions
         self.handlers = defaultdict(list)
+        # (handler, is_async) pairs per event, classified once at registration
+        self._dispatch = defaultdict(list)
         self.logger = logger
         self._lock = Lock()
         
@@ -93,9 +95,10 @@ class EventSystem:
         """Emit an event to all registered handlers"""
         if not hasattr(self, 'handlers'):
             self.handlers = defaultdict(list)
+            self._dispatch = defaultdict(list)
             self.logger.warning("Handlers attribute was missing - reinitializing")
             
-        if event_type in self.handlers:
+        if self._dispatch.get(event_type):
             # Make a copy of the data to avoid modifying the original
             safe_data = data.copy() if isinstance(data, dict) else {"value": data}
             
@@ -114,9 +117,10 @@ class EventSystem:
                     # Convert any other type to string
                     safe_data['client_id'] = str(safe_data['client_id'])
                 
-            for handler in self.handlers[event_type]:
+            # Iterate over a snapshot so handlers may (un)register during dispatch
+            for handler, is_async in tuple(self._dispatch[event_type]):
                 try:
-                    if asyncio.iscoroutinefunction(handler):
+                    if is_async:
                         # If handler is async, await it directly
                         await handler(safe_data)
                     else:
@@ -127,7 +131,7 @@ class EventSystem:
                     self.logger.error(f"Error in event handler for {event_type}: {str(e)}")
                     self.logger.exception("Full traceback:")
                     handler_name = getattr(handler, '__name__', str(handler))
-                    self.logger.debug(f"Handler: {handler_name}, Data: {safe_data}")
+                    self.logger.debug("Handler: {}, Data: {}", handler_name, safe_data)
     
     def on(self, event_type: str, handler):
         """Register an event handler"""
@@ -138,6 +142,7 @@ class EventSystem:
         # Ensure handlers attribute exists
         if not hasattr(self, 'handlers'):
             self.handlers = defaultdict(list)
+            self._dispatch = defaultdict(list)
             self.logger.warning("Handlers attribute was missing when registering - reinitializing")
 
         if event_type not in self.handlers:
@@ -146,6 +151,7 @@ class EventSystem:
         # Check if handler is already registered
         if handler not in self.handlers[event_type]:
             self.handlers[event_type].append(handler)
+            self._dispatch[event_type].append((handler, asyncio.iscoroutinefunction(handler)))
             handler_name = getattr(handler, '__name__', str(handler))
             self.logger.debug(f"Registered handler {handler_name} for event {event_type}")
         else:
@@ -157,22 +163,26 @@ class EventSystem:
         # Ensure handlers attribute exists
         if not hasattr(self, 'handlers'):
             self.handlers = defaultdict(list)
+            self._dispatch = defaultdict(list)
             self.logger.warning("Handlers attribute was missing when removing handler - reinitializing")
             return
             
         if event_type in self.handlers and handler in self.handlers[event_type]:
             self.handlers[event_type].remove(handler)
+            self._dispatch[event_type] = [entry for entry in self._dispatch[event_type] if entry[0] != handler]
             
     def remove_all_handlers(self, event_type: str):
         """Remove all handlers for a specific event type"""
         # Ensure handlers attribute exists
         if not hasattr(self, 'handlers'):
             self.handlers = defaultdict(list)
+            self._dispatch = defaultdict(list)
             self.logger.warning("Handlers attribute was missing when removing all handlers - reinitializing")
             return
             
         if event_type in self.handlers:
             self.handlers[event_type] = []
+            self._dispatch[event_type] = []
             self.logger.debug(f"Removed all handlers for event type: {event_type}")
             
     def add_event(self, event: SmartHomeEvent):
@@ -189,24 +199,17 @@ class EventSystem:
     def process_sensor_update(self, sensor_type: int, value: float, room_type: str = None):
         """Process a sensor update and check for triggered events"""
         try:
-            # Check regular events
-            for event in self._events:
-                for trigger in event.triggers:
-                    if trigger.sensor_type == sensor_type:
-                        if room_type and trigger.target_type and trigger.target_type != room_type:
-                            continue
-                        if trigger.check(value):
-                            logger.info(f"Sensor update triggered event: {event.name} (sensor type: {sensor_type}, value: {value})")
-                            event.trigger()
-            
-            # Check emergency events
+            # Regular and emergency events share one list, so check each trigger once
             for event in self._events:
                 for trigger in event.triggers:
                     if trigger.sensor_type == sensor_type:
                         if room_type and trigger.target_type and trigger.target_type != room_type:
                             continue
                         if trigger.check(value):
-                            logger.warning(f"Sensor update triggered emergency event: {event.name} (sensor type: {sensor_type}, value: {value})")
+                            if event.severity == 'emergency':
+                                logger.warning(f"Sensor update triggered emergency event: {event.name} (sensor type: {sensor_type}, value: {value})")
+                            else:
+                                logger.info(f"Sensor update triggered event: {event.name} (sensor type: {sensor_type}, value: {value})")
                             event.trigger()
             
             # Clean up expired events
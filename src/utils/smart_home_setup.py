@@ -8,7 +8,7 @@ from src.constants.units import UNITS
 import logging
 from src.database import db_session, SessionLocal
 from loguru import logger
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 logger = logging.getLogger(__name__)
 
@@ -261,8 +261,8 @@ class SmartHomeSetup:
             session = db_session()
             containers = session.query(Container).options(
                 joinedload(Container.scenario),
-                joinedload(Container.devices)
-                .joinedload(Device.sensors)
+                selectinload(Container.devices)
+                .selectinload(Device.sensors)
             ).all()
             
             scenarios = []
@@ -1,17 +1,20 @@
 import random
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from loguru import logger
 from src.models.device import Device
 from src.models.sensor import Sensor
 from src.models.container import Container
+from src.models.room import Room, normalize_room_type
 from src.utils.event_system import EventSystem
 import paho.mqtt.client as mqtt
 import time
 import threading
+import sys
 from src.database.database import db_session
 from sqlalchemy.orm import joinedload
-import json
+from sqlalchemy import select
+import orjson
 import os
 import subprocess
 from src.models.scenario import Scenario
@@ -19,15 +22,136 @@ from src.constants.device_templates import ROOM_TEMPLATES
 from src.models.environmental_factors import WeatherCondition, EnvironmentalState, Location, SimulationTime, get_sensor_value_modifier, WeatherImpactFactors
 import asyncio
 import math
+from functools import lru_cache
+from zoneinfo import ZoneInfo
 from src.services.weather_service import WeatherService, LocationQuery, LocationType
 from src.database.database import SessionLocal
 
+ROOM_CACHE_TTL = 60  # Seconds before the room type cache is reloaded
+YIELD_EVERY_DEVICES = 8  # Devices processed between cooperative yields to the event loop
+
+# Map device types to MQTT topic categories
+DEVICE_CATEGORIES = {
+    'environmental_monitor': 'sensor_hub',
+    'light_control': 'lighting',
+    'security_system': 'security_system',
+    'safety_monitor': 'safety'
+}
+
+# Room-specific adjustment per (normalized room type, sensor type)
+ROOM_SENSOR_FACTORS = {
+    ('living_room', 'temperature'): 1.1, ('living_room', 'humidity'): 0.9,
+    ('living_room', 'light'): 1.2, ('living_room', 'motion'): 1.5,
+    ('bedroom', 'temperature'): 0.9, ('bedroom', 'humidity'): 1.0,
+    ('bedroom', 'light'): 0.8, ('bedroom', 'motion'): 0.7,
+    ('kitchen', 'temperature'): 1.2, ('kitchen', 'humidity'): 1.2,
+    ('kitchen', 'light'): 1.1, ('kitchen', 'motion'): 1.3,
+    ('bathroom', 'temperature'): 1.0, ('bathroom', 'humidity'): 1.3,
+    ('bathroom', 'light'): 0.9, ('bathroom', 'motion'): 0.8,
+    ('office', 'temperature'): 1.0, ('office', 'humidity'): 0.9,
+    ('office', 'light'): 1.1, ('office', 'motion'): 1.0,
+    ('garage', 'temperature'): 0.8, ('garage', 'humidity'): 1.1,
+    ('garage', 'light'): 0.7, ('garage', 'motion'): 0.6
+}
+
+# Weather impact per (weather condition value, sensor type)
+WEATHER_SENSOR_IMPACTS = {
+    ('sunny', 'temperature'): 1.4, ('sunny', 'humidity'): 0.6,
+    ('sunny', 'light'): 1.5, ('sunny', 'air_quality'): 1.2,
+    ('partly_cloudy', 'temperature'): 1.2, ('partly_cloudy', 'humidity'): 0.8,
+    ('partly_cloudy', 'light'): 1.2, ('partly_cloudy', 'air_quality'): 1.1,
+    ('cloudy', 'temperature'): 0.8, ('cloudy', 'humidity'): 1.2,
+    ('cloudy', 'light'): 0.5, ('cloudy', 'air_quality'): 0.9,
+    ('rainy', 'temperature'): 0.7, ('rainy', 'humidity'): 1.5,
+    ('rainy', 'light'): 0.3, ('rainy', 'air_quality'): 0.8,
+    ('heavy_rain', 'temperature'): 0.6, ('heavy_rain', 'humidity'): 1.7,
+    ('heavy_rain', 'light'): 0.2, ('heavy_rain', 'air_quality'): 0.7,
+    ('stormy', 'temperature'): 0.5, ('stormy', 'humidity'): 1.8,
+    ('stormy', 'light'): 0.1, ('stormy', 'air_quality'): 0.6,
+    ('snowy', 'temperature'): 0.3, ('snowy', 'humidity'): 1.3,
+    ('snowy', 'light'): 0.8, ('snowy', 'air_quality'): 0.9,
+    ('heavy_snow', 'temperature'): 0.2, ('heavy_snow', 'humidity'): 1.4,
+    ('heavy_snow', 'light'): 0.6, ('heavy_snow', 'air_quality'): 0.8,
+    ('foggy', 'temperature'): 0.9, ('foggy', 'humidity'): 1.6,
+    ('foggy', 'light'): 0.4, ('foggy', 'air_quality'): 0.7
+}
+
+# Seasonal impact per (month, sensor type)
+SEASON_SENSOR_IMPACTS = {
+    (12, 'temperature'): 0.7, (12, 'humidity'): 0.9,
+    (1, 'temperature'): 0.6, (1, 'humidity'): 0.8,
+    (2, 'temperature'): 0.7, (2, 'humidity'): 0.9,
+    (3, 'temperature'): 0.9, (3, 'humidity'): 1.1,
+    (4, 'temperature'): 1.0, (4, 'humidity'): 1.2,
+    (5, 'temperature'): 1.1, (5, 'humidity'): 1.1,
+    (6, 'temperature'): 1.3, (6, 'humidity'): 1.0,
+    (7, 'temperature'): 1.4, (7, 'humidity'): 1.0,
+    (8, 'temperature'): 1.3, (8, 'humidity'): 1.1,
+    (9, 'temperature'): 1.1, (9, 'humidity'): 1.1,
+    (10, 'temperature'): 0.9, (10, 'humidity'): 1.2,
+    (11, 'temperature'): 0.8, (11, 'humidity'): 1.0
+}
+
+# Value range per sensor type; unknown types use the temperature range
+SENSOR_BASE_RANGES = {
+    'temperature': (15, 30),  # Celsius
+    'humidity': (30, 70),     # Percentage
+    'light': (0, 1000),       # Lux
+    'motion': (0, 1),         # Binary
+    'door': (0, 1),           # Binary
+    'window': (0, 1),         # Binary
+    'air_quality': (0, 500),  # AQI
+    'wind_speed': (0, 100),   # km/h
+    'rain_rate': (0, 50),     # mm/h
+    'pressure': (980, 1020),  # hPa
+    'co2': (400, 2000),       # ppm
+    'tvoc': (0, 1000),        # ppb
+    'smoke': (0, 1),          # Binary
+    'co': (0, 1),             # Binary
+    'color_temp': (2700, 6500),  # Kelvin
+    'contact_sensor': (0, 1),  # Binary
+    'status': (0, 1),         # Binary
+    'schedule': (0, 1),       # Binary (on/off)
+    'position': (0, 100),     # Percentage
+    'flow': (0, 10),          # L/min
+    'moisture': (0, 100),     # Percentage
+    'set_temperature': (16, 30),  # Celsius (HVAC setpoint)
+    'power': (0, 1),          # Binary (on/off) 
+    'fan_speed': (1, 5),      # Fan speed levels
+    'mode': (0, 4)            # Mode settings
+}
+
+# Daily cycle by hour of day: sin((hour - 6) * pi / 12), peaking at noon
+DAILY_CYCLE = tuple(math.sin((hour - 6) * math.pi / 12) for hour in range(24))
+
+# _get_room_types entry for devices without a known room (no room type, indoors)
+NO_ROOM = (None, True)
+
+# Sensor types simulated as on/off states
+BINARY_SENSOR_TYPES = frozenset({'motion', 'door', 'window', 'smoke', 'co', 'contact_sensor', 'status', 'schedule'})
+
+@lru_cache(maxsize=None)
+def _normalize_device_type(device_type: str) -> str:
+    """Normalized, interned device type; the set of device types is tiny"""
+    return sys.intern(device_type.lower().replace(" ", "_"))
+
+@lru_cache(maxsize=1)
+def _timezone_finder():
+    """Build the TimezoneFinder once; loading its polygon data is expensive"""
+    from timezonefinder import TimezoneFinder
+    return TimezoneFinder()
+
 class SmartHomeSimulator:
     """Class to handle smart home sensor value simulation"""
     
     _instance = None
     _initialized = False
     
+    # Statement for the simulation loop, built once so its compiled form is
+    # reused from the engine's query cache on every tick. Room types and
+    # indoor flags come from _get_room_types rather than loading each device's room.
+    _DEVICES_QUERY = select(Device).options(joinedload(Device.sensors))
+    
     @classmethod
     def get_instance(cls, event_system: EventSystem = None):
         """Get or create singleton instance"""
@@ -66,6 +190,16 @@ class SmartHomeSimulator:
         self.simulation_time = SimulationTime(datetime.now())
         self.env_state = self._create_environmental_state()
         
+        # Values derived only from the environment (weather impacts, sensor values
+        # before random variation) for one environmental state and hour
+        self._environment_values = {}
+        self._environment_cache_state = None
+        self._environment_cache_hours = None
+        
+        # Room id -> (normalized room type, is_indoor), reloaded every ROOM_CACHE_TTL seconds
+        self._room_type_cache = None
+        self._room_cache_ts = 0.0
+        
         # Configure MQTT client with environment variables
         self.client = mqtt.Client(
             client_id=f"smart_home_sim_{random.randint(1000,9999)}",
@@ -88,6 +222,7 @@ class SmartHomeSimulator:
         
         self.running = False
         self.simulation_thread = None
+        self._simulation_task = None  # Current _simulation_loop task
         self.connect_to_broker()
         self.start_simulation()
         
@@ -247,6 +382,7 @@ class SmartHomeSimulator:
     def _initialize_simulators(self):
         """Initialize simulators and initial sensor values"""
         try:
+            initial_updates = []
             with self.db() as session:
                 devices = session.query(Device).all()
                 for device in devices:
@@ -257,7 +393,7 @@ class SmartHomeSimulator:
                             session.add(sensor)
                             
                             # Prepare event data for initial value
-                            sensor_data = {
+                            initial_updates.append({
                                 'device_id': device.id,
                                 'device_name': device.name,
                                 'sensor_id': sensor.id,
@@ -265,14 +401,20 @@ class SmartHomeSimulator:
                                 'value': sensor.current_value,
                                 'unit': sensor.unit,
                                 'device_updates': device.update_counter
-                            }
-                            # Emit initial value
-                            asyncio.create_task(self.event_system.emit('sensor_update', sensor_data))
+                            })
                 session.commit()
-                logger.info("Initialized all sensor values")
+            # Emit all initial values from one task once they are persisted
+            if initial_updates:
+                asyncio.create_task(self._emit_sensor_updates(initial_updates))
+            logger.info("Initialized all sensor values")
         except Exception as e:
             logger.error(f"Error initializing simulators: {e}")
 
+    async def _emit_sensor_updates(self, updates):
+        """Emit a batch of sensor updates in order from a single task"""
+        for sensor_data in updates:
+            await self.event_system.emit('sensor_update', sensor_data)
+
     def _generate_initial_value(self, sensor_type: str) -> float:
         """Generate initial value for a sensor based on its type"""
         initial_values = {
@@ -341,14 +483,10 @@ class SmartHomeSimulator:
                 self.connect_to_broker()
                 
             # Ensure data is JSON serializable
-            message = json.dumps(data)
+            message = orjson.dumps(data)
             
             # Log MQTT details before publishing
-            logger.info(f"🚀 Publishing MQTT message:")
-            logger.info(f"  Topic: {topic}")
-            logger.info(f"  Data: {message}")
-            logger.info(f"  Broker: {self.broker_address}:{self.broker_port}")
-            logger.info(f"  Client Connected: {self.client.is_connected()}")
+            logger.debug("🚀 Publishing MQTT message to {} via {}:{}", topic, self.broker_address, self.broker_port)
             
             # Publish with QoS 1 to ensure delivery
             result = self.client.publish(topic, message, qos=1)
@@ -363,7 +501,6 @@ class SmartHomeSimulator:
             
             if result[0] == 0:
                 logger.info(f"✅ Successfully published to {topic}")
-                logger.debug(f"Message content: {message}")
             else:
                 logger.error(f"🚨 Failed to publish to {topic}. Result code: {result[0]}")
                 
@@ -517,49 +654,8 @@ class SmartHomeSimulator:
 
         normalized_room_type = room_type.lower().strip().replace(" ", "_")
         
-        # Room-specific factors for different sensor types
-        room_factors = {
-            'living_room': {
-                'temperature': 1.1,  # Slightly warmer
-                'humidity': 0.9,     # Slightly drier
-                'light': 1.2,        # Brighter
-                'motion': 1.5        # More motion expected
-            },
-            'bedroom': {
-                'temperature': 0.9,  # Slightly cooler
-                'humidity': 1.0,
-                'light': 0.8,        # Dimmer
-                'motion': 0.7        # Less motion expected
-            },
-            'kitchen': {
-                'temperature': 1.2,  # Warmer
-                'humidity': 1.2,     # More humid
-                'light': 1.1,
-                'motion': 1.3
-            },
-            'bathroom': {
-                'temperature': 1.0,
-                'humidity': 1.3,     # More humid
-                'light': 0.9,
-                'motion': 0.8
-            },
-            'office': {
-                'temperature': 1.0,
-                'humidity': 0.9,
-                'light': 1.1,
-                'motion': 1.0
-            },
-            'garage': {
-                'temperature': 0.8,  # Cooler
-                'humidity': 1.1,
-                'light': 0.7,        # Dimmer
-                'motion': 0.6        # Less motion
-            }
-        }
-
-        # Get room-specific factors or default to 1.0
-        room_type_factors = room_factors.get(normalized_room_type, {})
-        return room_type_factors.get(sensor_type.lower(), 1.0)
+        # Get the room-specific factor or default to 1.0
+        return ROOM_SENSOR_FACTORS.get((normalized_room_type, sensor_type.lower()), 1.0)
 
     def _calculate_time_factor(self, hour: int) -> float:
         """Calculate time of day impact factor"""
@@ -582,98 +678,38 @@ class SmartHomeSimulator:
             # Night: lowest
             return 0.5
 
+    def _environment_cache(self):
+        """Memo for values that depend only on the environment
+        
+        Cleared when env_state is replaced or the wall-clock or simulated hour
+        changes, so entries stay valid across every sensor of a tick.
+        """
+        hours = (datetime.now().hour, self.simulation_time.effective_time.hour)
+        if self.env_state is not self._environment_cache_state or hours != self._environment_cache_hours:
+            self._environment_values = {}
+            self._environment_cache_state = self.env_state
+            self._environment_cache_hours = hours
+        return self._environment_values
+
     def _calculate_weather_impact(self, sensor_type: str, weather: WeatherCondition) -> float:
+        """Weather impact factor for sensor values, computed once per environment"""
+        cache = self._environment_cache()
+        key = ('weather_impact', sensor_type, weather)
+        impact = cache.get(key)
+        if impact is None:
+            impact = cache[key] = self._compute_weather_impact(sensor_type, weather)
+        return impact
+
+    def _compute_weather_impact(self, sensor_type: str, weather: WeatherCondition) -> float:
         """Calculate weather impact factor for sensor values"""
-        # Enhanced impact factors for different weather conditions
-        weather_impacts = {
-            'sunny': {
-                'temperature': 1.4,    # Much warmer
-                'humidity': 0.6,       # Much drier
-                'light': 1.5,         # Much brighter
-                'air_quality': 1.2    # Better air quality
-            },
-            'partly_cloudy': {
-                'temperature': 1.2,
-                'humidity': 0.8,
-                'light': 1.2,
-                'air_quality': 1.1
-            },
-            'cloudy': {
-                'temperature': 0.8,    # Cooler
-                'humidity': 1.2,       # More humid
-                'light': 0.5,         # Much darker
-                'air_quality': 0.9
-            },
-            'rainy': {
-                'temperature': 0.7,    # Much cooler
-                'humidity': 1.5,       # Much more humid
-                'light': 0.3,         # Very dark
-                'air_quality': 0.8
-            },
-            'heavy_rain': {
-                'temperature': 0.6,
-                'humidity': 1.7,
-                'light': 0.2,
-                'air_quality': 0.7
-            },
-            'stormy': {
-                'temperature': 0.5,    # Cold
-                'humidity': 1.8,       # Very humid
-                'light': 0.1,         # Extremely dark
-                'air_quality': 0.6
-            },
-            'snowy': {
-                'temperature': 0.3,    # Very cold
-                'humidity': 1.3,
-                'light': 0.8,         # Snow reflects light
-                'air_quality': 0.9
-            },
-            'heavy_snow': {
-                'temperature': 0.2,
-                'humidity': 1.4,
-                'light': 0.6,
-                'air_quality': 0.8
-            },
-            'foggy': {
-                'temperature': 0.9,
-                'humidity': 1.6,
-                'light': 0.4,
-                'air_quality': 0.7
-            }
-        }
-        
-        # Enhanced seasonal impact factors
         month = datetime.now().month
-        season_impacts = {
-            # Winter (Dec-Feb)
-            12: {'temperature': 0.7, 'humidity': 0.9},
-            1: {'temperature': 0.6, 'humidity': 0.8},
-            2: {'temperature': 0.7, 'humidity': 0.9},
-            
-            # Spring (Mar-May)
-            3: {'temperature': 0.9, 'humidity': 1.1},
-            4: {'temperature': 1.0, 'humidity': 1.2},
-            5: {'temperature': 1.1, 'humidity': 1.1},
-            
-            # Summer (Jun-Aug)
-            6: {'temperature': 1.3, 'humidity': 1.0},
-            7: {'temperature': 1.4, 'humidity': 1.0},
-            8: {'temperature': 1.3, 'humidity': 1.1},
-            
-            # Fall (Sep-Nov)
-            9: {'temperature': 1.1, 'humidity': 1.1},
-            10: {'temperature': 0.9, 'humidity': 1.2},
-            11: {'temperature': 0.8, 'humidity': 1.0}
-        }
-
+        
         # Get weather-specific impacts or default to neutral (1.0)
-        weather_type = weather.value.lower()
-        weather_type_impacts = weather_impacts.get(weather_type, {})
-        impact = weather_type_impacts.get(sensor_type.lower(), 1.0)
+        sensor_type = sensor_type.lower()
+        impact = WEATHER_SENSOR_IMPACTS.get((weather.value.lower(), sensor_type), 1.0)
         
         # Apply seasonal adjustment
-        season_impact = season_impacts.get(month, {}).get(sensor_type.lower(), 1.0)
-        impact *= season_impact
+        impact *= SEASON_SENSOR_IMPACTS.get((month, sensor_type), 1.0)
         
         # Add time-based amplification of weather effects
         hour = self.simulation_time.effective_time.hour
@@ -687,7 +723,7 @@ class SmartHomeSimulator:
             impact = 1.0 + (deviation * 0.7)  # 30% weaker effect during night
             
         # Apply outdoor temperature effect on humidity impact
-        if sensor_type.lower() == 'humidity':
+        if sensor_type == 'humidity':
             # Get current outdoor temperature from environmental state
             outdoor_temp = self.env_state.temperature_celsius
             
@@ -764,51 +800,27 @@ class SmartHomeSimulator:
             self.current_location
         )
 
-    def _generate_sensor_value(self, sensor):
-        """Generate a sensor value based on type and environmental conditions"""
+    def _generate_sensor_value(self, sensor, is_indoor: Optional[bool] = None):
+        """Generate a sensor value based on type and environmental conditions
+        
+        Callers that know whether the sensor's room is indoors pass is_indoor
+        (see _get_room_types); otherwise it is read from the device's room.
+        """
         try:
-            # Define base ranges for different sensor types
-            base_ranges = {
-                'temperature': (15, 30),  # Celsius
-                'humidity': (30, 70),     # Percentage
-                'light': (0, 1000),       # Lux
-                'motion': (0, 1),         # Binary
-                'door': (0, 1),           # Binary
-                'window': (0, 1),         # Binary
-                'air_quality': (0, 500),  # AQI
-                'wind_speed': (0, 100),   # km/h
-                'rain_rate': (0, 50),     # mm/h
-                'pressure': (980, 1020),  # hPa
-                'co2': (400, 2000),       # ppm
-                'tvoc': (0, 1000),        # ppb
-                'smoke': (0, 1),          # Binary
-                'co': (0, 1),             # Binary
-                'color_temp': (2700, 6500),  # Kelvin
-                'contact_sensor': (0, 1),  # Binary
-                'status': (0, 1),         # Binary
-                'schedule': (0, 1),       # Binary (on/off)
-                'position': (0, 100),     # Percentage
-                'flow': (0, 10),          # L/min
-                'moisture': (0, 100),     # Percentage
-                'set_temperature': (16, 30),  # Celsius (HVAC setpoint)
-                'power': (0, 1),          # Binary (on/off) 
-                'fan_speed': (1, 5),      # Fan speed levels
-                'mode': (0, 4)            # Mode settings
-            }
-            
             # Get base range for sensor type
             sensor_type = sensor.type.lower()
-            base_min, base_max = base_ranges.get(sensor_type, base_ranges['temperature'])
+            base_min, base_max = SENSOR_BASE_RANGES.get(sensor_type, SENSOR_BASE_RANGES['temperature'])
             
             # Get current value or use midpoint
             current = sensor.current_value if sensor.current_value is not None else (base_min + base_max) / 2
             
-            # Get room type and indoor/outdoor status
-            room_type = sensor.device.room.room_type if sensor.device and sensor.device.room else None
-            is_indoor = sensor.device.room.is_indoor if sensor.device and sensor.device.room else True
+            # Get indoor/outdoor status (resolve the device's room once)
+            if is_indoor is None:
+                room = sensor.device.room if sensor.device else None
+                is_indoor = room.is_indoor if room else True
             
             # Handle sensor types
-            if sensor_type in ['motion', 'door', 'window', 'smoke', 'co', 'contact_sensor', 'status', 'schedule']:
+            if sensor_type in BINARY_SENSOR_TYPES:
                 return self._handle_binary_sensors(sensor_type, current, base_min, base_max, is_indoor)
             elif sensor_type == 'moisture':
                 return self._handle_moisture_sensor(sensor, current, base_min, base_max, is_indoor)
@@ -1014,49 +1026,13 @@ class SmartHomeSimulator:
         return target
 
     def _calculate_sensor_value(self, sensor_type, base_min, base_max, is_indoor):
-        """Calculate sensor value based on environmental conditions and room type"""
+        """Calculate sensor value based on environmental conditions and room type
+        
+        Only the random variation differs between sensors of the same type; the
+        rest comes from _sensor_base_value, computed once per type.
+        """
         try:
-            # Get current time and weather
-            current_time = datetime.now()
-            outdoor_temp = self.env_state.temperature_celsius  # Access temperature from EnvironmentalState
-            outdoor_humidity = self.env_state.humidity_percent  # Access humidity from EnvironmentalState
-
-            # Calculate base value as the midpoint of the range
-            base_value = (base_min + base_max) / 2
-
-            # Calculate temperature using Newton's Law of Cooling
-            indoor_temp = base_value  # Current indoor temperature
-            U = 0.1  # Overall heat loss coefficient (example value)
-            C = 1.0  # Thermal capacitance (example value)
-            P_hvac = 0  # HVAC power (can be adjusted based on AC state)
-            dt = 1  # Time step in minutes
-            dT_dt = -U / C * (indoor_temp - outdoor_temp) + P_hvac / C
-            new_temp = indoor_temp + dT_dt * dt
-            base_value = new_temp
-
-            # Calculate humidity using a mass-balance approach
-            indoor_humidity = base_value  # Current indoor humidity
-            ventilation_rate = 0.1  # Example ventilation rate
-            internal_sources = 0.5  # Example internal moisture sources (e.g., occupants)
-            dH_dt = ventilation_rate * (outdoor_humidity - indoor_humidity) + internal_sources
-            new_humidity = indoor_humidity + dH_dt * dt
-            base_value = new_humidity
-
-            # Calculate weather impact
-            weather_impact = self._calculate_weather_impact(sensor_type, self.env_state.weather_condition)
-
-            # Calculate time-based variation
-            hour = current_time.hour
-            time_modifier = math.sin((hour - 6) * math.pi / 12) * 0.1 * (base_max - base_min)
-
-            # Apply weather impact modifier
-            weather_modifier = (weather_impact - 1.0) * 0.2 * (base_max - base_min)
-
-            # Combine base value with modifiers
-            modified_value = base_value + weather_modifier + time_modifier
-
-            # Ensure values stay within the defined range
-            modified_value = max(base_min, min(base_max, modified_value))
+            modified_value = self._sensor_base_value(sensor_type, base_min, base_max)
 
             # Add small random variation (±5%)
             variation = random.uniform(-0.05, 0.05) * modified_value
@@ -1065,6 +1041,62 @@ class SmartHomeSimulator:
             logger.error(f"Error calculating sensor value for {sensor_type}: {str(e)}")
             return (base_min + base_max) / 2  # Return midpoint as fallback
 
+    def _sensor_base_value(self, sensor_type, base_min, base_max):
+        """Sensor value before random variation
+        
+        Depends only on the sensor type and the environment, so it is cached in
+        the environment cache.
+        """
+        cache = self._environment_cache()
+        key = ('base_value', sensor_type, base_min, base_max)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Wall-clock hour the cache was filled for
+        hour = self._environment_cache_hours[0]
+        
+        outdoor_temp = self.env_state.temperature_celsius  # Access temperature from EnvironmentalState
+        outdoor_humidity = self.env_state.humidity_percent  # Access humidity from EnvironmentalState
+
+        # Calculate base value as the midpoint of the range
+        base_value = (base_min + base_max) / 2
+
+        # Calculate temperature using Newton's Law of Cooling
+        indoor_temp = base_value  # Current indoor temperature
+        U = 0.1  # Overall heat loss coefficient (example value)
+        C = 1.0  # Thermal capacitance (example value)
+        P_hvac = 0  # HVAC power (can be adjusted based on AC state)
+        dt = 1  # Time step in minutes
+        dT_dt = -U / C * (indoor_temp - outdoor_temp) + P_hvac / C
+        new_temp = indoor_temp + dT_dt * dt
+        base_value = new_temp
+
+        # Calculate humidity using a mass-balance approach
+        indoor_humidity = base_value  # Current indoor humidity
+        ventilation_rate = 0.1  # Example ventilation rate
+        internal_sources = 0.5  # Example internal moisture sources (e.g., occupants)
+        dH_dt = ventilation_rate * (outdoor_humidity - indoor_humidity) + internal_sources
+        new_humidity = indoor_humidity + dH_dt * dt
+        base_value = new_humidity
+
+        # Calculate weather impact
+        weather_impact = self._calculate_weather_impact(sensor_type, self.env_state.weather_condition)
+
+        # Calculate time-based variation
+        time_modifier = DAILY_CYCLE[hour] * 0.1 * (base_max - base_min)
+
+        # Apply weather impact modifier
+        weather_modifier = (weather_impact - 1.0) * 0.2 * (base_max - base_min)
+
+        # Combine base value with modifiers
+        modified_value = base_value + weather_modifier + time_modifier
+
+        # Ensure values stay within the defined range
+        modified_value = max(base_min, min(base_max, modified_value))
+        cache[key] = modified_value
+        return modified_value
+
     def start_container(self, container):
         """Start all sensors in a container"""
         logger.debug(f"Starting container {container.name} with {len(container.devices)} devices")
@@ -1083,10 +1115,8 @@ class SmartHomeSimulator:
         logger.info(f"Stopped container {container.name} sensors")
 
     def _stop_sensor_simulation(self, sensor):
-        """Stop sensor using ID from database session"""
-        with db_session() as session:
-            current_sensor = session.merge(sensor)
-            self._stop_sensor_simulation_by_id(current_sensor.id)
+        """Stop sensor simulation; only the already-loaded ID is needed"""
+        self._stop_sensor_simulation_by_id(sensor.id)
 
     def _stop_sensor_simulation_by_id(self, sensor_id: int):
         """Thread-safe sensor stopping by ID"""
@@ -1098,8 +1128,13 @@ class SmartHomeSimulator:
         """Starts the simulation loop."""
         if not self.running:
             self.running = True
+            # A loop stopped during its sleep has not exited yet; cancel it so
+            # two loops never run side by side
+            if self._simulation_task is not None and not self._simulation_task.done():
+                self._simulation_task.cancel()
             logger.info("Starting simulation loop")
-            asyncio.create_task(self._simulation_loop())
+            # Keep a reference: the event loop only holds weak references to tasks
+            self._simulation_task = asyncio.create_task(self._simulation_loop())
         else:
             logger.warning("Simulation already running")
 
@@ -1122,6 +1157,21 @@ class SmartHomeSimulator:
             
         logger.info("SmartHomeSimulator shutdown complete")
 
+    def _get_room_types(self, session) -> Dict[int, Tuple[Optional[str], bool]]:
+        """Get the cached room id -> (normalized room type, is_indoor) mapping, reloading it when stale"""
+        if self._room_type_cache is None or time.monotonic() - self._room_cache_ts > ROOM_CACHE_TTL:
+            self._room_type_cache = {
+                room_id: (normalize_room_type(room_type) if room_type else None, bool(is_indoor))
+                for room_id, room_type, is_indoor in session.query(Room.id, Room.room_type, Room.is_indoor).all()
+            }
+            self._room_cache_ts = time.monotonic()
+            logger.debug(f"Loaded room types for {len(self._room_type_cache)} rooms")
+        return self._room_type_cache
+
+    def invalidate_room_cache(self):
+        """Force the room type mapping to be reloaded (call after room edits)"""
+        self._room_type_cache = None
+
     async def _simulation_loop(self):
         """Main simulation loop with proper session handling"""
         logger.info("🔄 Simulation loop started")
@@ -1130,80 +1180,82 @@ class SmartHomeSimulator:
                 logger.info("⏱️ Running simulation iteration")
                 with SessionLocal() as session:
                     # Query devices with their sensors
-                    devices = session.query(Device).options(
-                        joinedload(Device.sensors)
-                    ).all()
+                    devices = session.execute(self._DEVICES_QUERY).unique().scalars().all()
+                    room_types = self._get_room_types(session)
+                    
+                    # Values shared by every payload in this tick
+                    weather = self.env_state.weather_condition.value
+                    region = self.env_state.location.region
+                    timestamp = datetime.now().isoformat()
+                    
+                    # Bind the per-sensor calls once per tick
+                    emit = self.event_system.emit
+                    publish = self.publish_sensor_data
+                    generate_value = self._generate_sensor_value
                     
                     logger.info(f"📊 Processing {len(devices)} devices")
                     
-                    for device in devices:
+                    for index, device in enumerate(devices):
+                        # Give UI handlers a chance to run on homes with many devices
+                        if index and index % YIELD_EVERY_DEVICES == 0:
+                            await asyncio.sleep(0)
                         try:
                             device_updated = False
-                            logger.info(f"🔍 Processing device: {device.name} with {len(device.sensors)} sensors")
                             
                             # Get device type and location
-                            device_type = device.type.lower().replace(" ", "_")
-                            location = None
-                            if device.room:
-                                location = device.room.room_type.lower().replace(" ", "_")
+                            device_type = _normalize_device_type(device.type)
+                            location, is_indoor = room_types.get(device.room_id, NO_ROOM)
                             
                             # Map device types to categories
-                            device_category = {
-                                'environmental_monitor': 'sensor_hub',
-                                'light_control': 'lighting',
-                                'security_system': 'security_system',
-                                'safety_monitor': 'safety'
-                            }.get(device_type, device_type)
+                            device_category = DEVICE_CATEGORIES.get(device_type, device_type)
                             
-                            logger.info(f"🔍 Processing device: {device.name} at {location} with {len(device.sensors)} sensors")
+                            logger.debug("🔍 Processing device: {} at {} with {} sensors", device.name, location, len(device.sensors))
 
                             # Update sensor values
                             for sensor in device.sensors:
-                                # Merge sensor with current session
-                                sensor = session.merge(sensor)
-                                
                                 # Generate new sensor value
-                                new_value = self._generate_sensor_value(sensor)
+                                new_value = generate_value(sensor, is_indoor)
                                 
-                                logger.info(f"🔍 Sensor: {sensor.name} - New value: {new_value} - Current value: {sensor.current_value}")
+                                logger.debug("🔍 Sensor: {} - New value: {} - Current value: {}", sensor.name, new_value, sensor.current_value)
 
                                 # Only update if value has changed significantly
                                 if sensor.current_value is None or abs(new_value - sensor.current_value) >= 0.01:
                                     old_value = sensor.current_value
                                     sensor.current_value = new_value
+                                    unit = sys.intern(sensor.unit) if sensor.unit else sensor.unit
                                     session.add(sensor)
                                     device_updated = True
                                     
-                                    # Create sensor data payload
-                                    sensor_data = {
-                                        'id': sensor.id,
-                                        'name': sensor.name or f'sensor_{sensor.id}',
-                                        'type': sensor.type,
-                                        'value': new_value,
-                                        'unit': sensor.unit,
-                                        'timestamp': datetime.now().isoformat(),
-                                        'device_id': sensor.device_id,
-                                        'location': location,
-                                        'weather': self.env_state.weather_condition.value,
-                                        'region': self.env_state.location.region,
-                                        'previous_value': old_value
-                                    }
-                                    
                                     # Log sensor update
                                     logger.info(f"📡 Sensor update - {sensor.name}: {new_value} {sensor.unit}")
                                     
                                     # Publish to MQTT with updated topic structure
                                     if location and device_category:
+                                        # Create sensor data payload (only needed when publishing)
+                                        sensor_data = {
+                                            'id': sensor.id,
+                                            'name': sensor.name or f'sensor_{sensor.id}',
+                                            'type': sensor.type,
+                                            'value': new_value,
+                                            'unit': unit,
+                                            'timestamp': timestamp,
+                                            'device_id': sensor.device_id,
+                                            'location': location,
+                                            'weather': weather,
+                                            'region': region,
+                                            'previous_value': old_value
+                                        }
+                                        
                                         # Create MQTT topic with the new structure
                                         topic = f"smart_home/{location}/{device_category}/{sensor.type.lower()}"
-                                        self.publish_sensor_data(topic, sensor_data)
-                                        logger.debug(f"Published sensor data to topic: {topic} - {sensor_data}")
+                                        publish(topic, sensor_data)
+                                        logger.debug("Published sensor data to topic: {} - {}", topic, sensor_data)
                                         # Emit event for UI update
-                                        await self.event_system.emit('sensor_update', {
+                                        await emit('sensor_update', {
                                             'sensor_id': sensor.id,
                                             'value': new_value,
-                                            'unit': sensor.unit,
-                                            'timestamp': datetime.now().isoformat(),
+                                            'unit': unit,
+                                            'timestamp': timestamp,
                                             'device_id': device.id,
                                             'device_name': device.name,
                                             'location': location,
@@ -1216,7 +1268,7 @@ class SmartHomeSimulator:
                                 session.add(device)
                                 logger.debug(f"Device updated: {device.name} - {device.update_counter}")
                                 # Emit device update event for UI
-                                await self.event_system.emit('device_update', {
+                                await emit('device_update', {
                                     'device_id': device.id,
                                     'name': device.name,
                                     'type': device_category,
@@ -1262,12 +1314,8 @@ class SmartHomeSimulator:
                 if hasattr(self.weather_service, 'get_weather_async'):
                     weather_data = await self.weather_service.get_weather_async(location_query)
                 else:
-                    # Fall back to synchronous method in a thread pool
-                    import functools
-                    weather_data = await asyncio.get_event_loop().run_in_executor(
-                        None, 
-                        functools.partial(self.weather_service.get_weather, location_query)
-                    )
+                    # Fall back to the blocking method in a worker thread
+                    weather_data = await asyncio.to_thread(self.weather_service.get_weather, location_query)
             except Exception as e:
                 logger.error(f"Error fetching weather data: {str(e)}")
                 
@@ -1281,25 +1329,16 @@ class SmartHomeSimulator:
                 
                 # Get the local time for the selected region
                 try:
-                    # Import pytz for timezone handling if available
-                    import pytz
-                    from datetime import datetime
-                    
                     # Try to get the timezone from the location object
                     timezone_str = location.timezone
                     if not timezone_str:
                         # Default to a timezone based on longitude if not specified
                         # This is a rough approximation - better to have the actual timezone
-                        from timezonefinder import TimezoneFinder
-                        tf = TimezoneFinder()
-                        timezone_str = tf.timezone_at(lat=location.latitude, lng=location.longitude)
+                        timezone_str = _timezone_finder().timezone_at(lat=location.latitude, lng=location.longitude)
                         
                     if timezone_str:
-                        # Get the timezone object
-                        timezone = pytz.timezone(timezone_str)
-                        
-                        # Get the current time in that timezone
-                        local_time = datetime.now(timezone)
+                        # Get the current time in that timezone (ZoneInfo caches zones by key)
+                        local_time = datetime.now(ZoneInfo(timezone_str))
                         logger.info(f"Local time in {location.region}: {local_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
                         
                         # Update simulation time with the local time
@@ -1333,10 +1372,7 @@ class SmartHomeSimulator:
                 # Get forecast data if method is available
                 if hasattr(self.weather_service, 'get_forecast'):
                     try:
-                        forecast = await asyncio.get_event_loop().run_in_executor(
-                            None, 
-                            functools.partial(self.weather_service.get_forecast, location_query)
-                        )
+                        forecast = await asyncio.to_thread(self.weather_service.get_forecast, location_query)
                         if forecast:
                             logger.info(f"Forecast data received for {len(forecast)} periods")
                             # Store forecast data for future use
@@ -1356,27 +1392,25 @@ class SmartHomeSimulator:
     async def refresh_all_sensor_values(self):
         """Refresh all sensor values to reflect updated environmental conditions"""
         try:
-            # Get all active sensors
-            with SessionLocal() as session:
-                active_sensors = session.query(Sensor).all()
-                
-            # Update each sensor with new environmental conditions
-            for sensor in active_sensors:
-                # Only update if the sensor is being simulated
-                if sensor.id in self.sensor_threads:
-                    try:
-                        # Generate new value based on updated environmental state
-                        new_value = self._generate_sensor_value(sensor)
-                        
-                        # Update sensor value
-                        with SessionLocal() as session:
-                            db_sensor = session.query(Sensor).filter_by(id=sensor.id).first()
-                            if db_sensor:
-                                db_sensor.current_value = new_value
-                                session.commit()
-                                logger.debug(f"Updated sensor {sensor.name} value to {new_value}")
-                    except Exception as e:
-                        logger.error(f"Error updating sensor {sensor.name}: {str(e)}")
+            # Only sensors that are being simulated need a refresh
+            active_ids = list(self.sensor_threads)
+            if active_ids:
+                with SessionLocal() as session:
+                    active_sensors = session.query(Sensor).filter(Sensor.id.in_(active_ids)).all()
+                    room_types = self._get_room_types(session)
+                    
+                    # Update each sensor with new environmental conditions
+                    for sensor in active_sensors:
+                        try:
+                            # Generate new value based on updated environmental state
+                            _, is_indoor = room_types.get(sensor.device.room_id, NO_ROOM) if sensor.device else NO_ROOM
+                            sensor.current_value = self._generate_sensor_value(sensor, is_indoor)
+                            logger.debug(f"Updated sensor {sensor.name} value to {sensor.current_value}")
+                        except Exception as e:
+                            logger.error(f"Error updating sensor {sensor.name}: {str(e)}")
+                    
+                    # Write all refreshed values in one transaction
+                    session.commit()
                         
             logger.info(f"Refreshed values for all active sensors based on new weather data")
             return True
@@ -1699,6 +1733,7 @@ class SmartHomeSimulator:
 
     def add_room(self, room):
         self.rooms.append(room)
+        self.invalidate_room_cache()
 
     def run_simulation(self, hvac_power, time_step, duration):
         """Run the simulation for a specified duration."""
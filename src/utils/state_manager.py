@@ -3,7 +3,7 @@ from loguru import logger
 from src.database import SessionLocal
 from src.models.scenario import Scenario
 from src.models.container import Container
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 from typing import Dict, Any, Optional, List
 
 class StateManager:
@@ -99,7 +99,7 @@ class StateManager:
                 active_scenario = session.query(Scenario).filter(
                     Scenario.is_active == True
                 ).options(
-                    joinedload(Scenario.containers)
+                    selectinload(Scenario.containers)
                 ).first()
                 
                 # Get all active containers